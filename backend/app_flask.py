@@ -3,7 +3,7 @@ import sys
 from flask import Flask
 from flask_cors import CORS
 from flasklib.json_encoder import CustomJSONEncoder
-from flasklib import init_routes
+from flasklib import init_routes, warmup
 import flasklib.config as config
 
 # ========================
@@ -33,4 +33,6 @@ if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 5000))
     logger.info("⚡ Flask app starting on port %d", port)
+    # Préchauffage des connexions et maintien des bases éveillées (thread de fond)
+    warmup.start()
     app.run(host="0.0.0.0", port=port, debug=config.DEBUG)
@@ -3,9 +3,12 @@ from . import backup
 from . import backup_list
 from . import restore_drive
 from . import rpc
+from . import prototypes
 from . import gdrive_image
 from . import upload_to_drive
 from . import routes
+from . import compression
+from . import warmup
 
 def init_routes(app):
     # Routes globales (login, verify, health, root, databases)
@@ -14,6 +17,7 @@ def init_routes(app):
     
     # Routes RPC
     rpc.register_routes(app)
+    prototypes.register_routes(app)
 
     # Routes Backup
     backup.register_routes(app)
@@ -23,3 +27,9 @@ def init_routes(app):
     # Routes Google Drive images
     gdrive_image.register_routes(app)
     upload_to_drive.register_routes(app)
+
+    # Compression des réponses (gzip / brotli)
+    compression.register_hooks(app)
+
+    # Préchauffage des connexions, lancé dans chaque worker
+    warmup.register_hooks(app)
@@ -0,0 +1,155 @@
+import functools
+import logging
+import math
+import threading
+import time
+from flask import request
+from werkzeug.exceptions import HTTPException
+import flasklib.config as config
+from .config import get_db_config
+from .json_encoder import json_response
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Contrôle d'admission : budget de requêtes simultanées par base et par voie
+#
+#   - "rpc"   : appels RPC (lectures courtes, écritures unitaires)
+#   - "heavy" : backup, restore et upload Drive
+#   - "photo" : miniatures servies depuis Drive (courtes et nombreuses : une sauvegarde
+#               en cours ne doit pas les faire refuser)
+#
+# Au-delà du budget, une requête attend dans une file bornée ; file pleine ou
+# attente dépassée → 503 + Retry-After, sans occuper de worker ni de connexion.
+# Réglages par défaut dans config.py, surchargés par la clé "limits" de databases.json :
+#   "limits": {"rpc": {"concurrency": 8, "queue": 32, "timeout": 10},
+#              "heavy": {"concurrency": 1, "queue": 2, "timeout": 5},
+#              "photo": {"concurrency": 4, "queue": 16, "timeout": 10}}
+
+LANES = ("rpc", "heavy", "photo")
+
+
+class Overloaded(Exception):
+    def __init__(self, database_id, lane, retry_after):
+        super().__init__(f"Too many concurrent '{lane}' requests on {database_id}")
+        self.retry_after = retry_after
+
+
+class Lane:
+    """Sémaphore à file d'attente bornée et délai d'attente maximal."""
+
+    def __init__(self, database_id, name, concurrency, queue, timeout):
+        self.database_id = database_id
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def _reject(self):
+        self.rejected += 1
+        raise Overloaded(self.database_id, self.name, max(1, math.ceil(self.timeout)))
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return
+            if self.waiting >= self.queue:
+                self._reject()
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject()
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def snapshot(self):
+        return {"active": self.active, "waiting": self.waiting, "rejected": self.rejected,
+                "concurrency": self.concurrency, "queue": self.queue}
+
+
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+def _lane_settings(database_id, lane):
+    defaults = {
+        "rpc": (config.ADMISSION_RPC_CONCURRENCY, config.ADMISSION_RPC_QUEUE, config.ADMISSION_RPC_TIMEOUT),
+        "heavy": (config.ADMISSION_HEAVY_CONCURRENCY, config.ADMISSION_HEAVY_QUEUE, config.ADMISSION_HEAVY_TIMEOUT),
+        "photo": (config.ADMISSION_PHOTO_CONCURRENCY, config.ADMISSION_PHOTO_QUEUE, config.ADMISSION_PHOTO_TIMEOUT),
+    }[lane]
+    overrides = (get_db_config(database_id).get("limits") or {}).get(lane) or {}
+    return (
+        int(overrides.get("concurrency", defaults[0])),
+        int(overrides.get("queue", defaults[1])),
+        float(overrides.get("timeout", defaults[2])),
+    )
+
+
+def get_lane(database_id, lane):
+    key = (database_id, lane)
+    limiter = _lanes.get(key)
+    if limiter is None:
+        with _lanes_lock:
+            limiter = _lanes.get(key)
+            if limiter is None:
+                limiter = _lanes[key] = Lane(database_id, lane, *_lane_settings(database_id, lane))
+    return limiter
+
+
+def snapshot(database_id):
+    """État des voies déjà utilisées d'une base (pour /health)."""
+    return {lane: limiter.snapshot() for (db, lane), limiter in list(_lanes.items()) if db == database_id}
+
+
+def admit(lane):
+    """
+    Décorateur de route : la requête n'est exécutée qu'avec une place dans la voie lane
+    de sa base (paramètre database_id). Pour une réponse en flux, la place est rendue
+    à la fin de l'envoi.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            database_id = kwargs.get("database_id")
+            if not config.ADMISSION_ENABLED or not database_id or request.method == "OPTIONS":
+                return view(*args, **kwargs)
+
+            try:
+                limiter = get_lane(database_id.upper(), lane)
+            except HTTPException as e:
+                # Base absente de databases.json (abort 404 de get_db_config)
+                return json_response({"data": None, "error": e.description}, e.code)
+            try:
+                limiter.acquire()
+            except Overloaded as e:
+                logger.warning("🚦 %s", e)
+                response = json_response({"data": None, "error": str(e)}, 503)
+                response.headers["Retry-After"] = str(e.retry_after)
+                return response
+
+            try:
+                response = view(*args, **kwargs)
+            except Exception:
+                limiter.release()
+                raise
+            if getattr(response, "is_streamed", False):
+                response.call_on_close(limiter.release)
+            else:
+                limiter.release()
+            return response
+        return wrapper
+    return decorator
@@ -36,33 +36,34 @@ def login(database_id=None):
     jwt_issuer = db_config.get("issuer", "https://fallback.issuer")
     DBUSER = db_config.get("user")
 
-    conn = None
     try:
-        conn = get_conn(database_id) if database_id else get_conn()
-        check_get_function_prototype_exists(conn)
-
-        cur = conn.cursor()
-        logger.debug("Connected to DB, setting role %s", DBUSER)
-        cur.execute(f"SET ROLE \"{DBUSER}\";")
-
-        # 🔹 Vérifie si les viewers sont autorisés
-        cur.execute("SELECT viewer_allowed FROM inventory.app_config LIMIT 1;")
-        viewer_allowed = cur.fetchone()
-        viewer_allowed = viewer_allowed and viewer_allowed[0]
-
-        cur.execute("""
-            SELECT 
-                u.id,
-                u.email,
-                p.raw_user_meta_data->'app_metadata'->>'first_name',
-                p.raw_user_meta_data->'app_metadata'->>'last_name',
-                u.encrypted_password,
-                u.role
-            FROM auth.users u
-            LEFT JOIN auth.user_profiles p ON u.id = p.user_id
-            WHERE u.email = %s
-        """, (email,))
-        row = cur.fetchone()
+        # 🔹 Connexion empruntée au pool, rendue dès les lectures terminées
+        with (get_conn(database_id) if database_id else get_conn()) as conn:
+            check_get_function_prototype_exists(conn)
+
+            cur = conn.cursor()
+            logger.debug("Connected to DB, setting role %s", DBUSER)
+            cur.execute(f"SET ROLE \"{DBUSER}\";")
+
+            # 🔹 Vérifie si les viewers sont autorisés
+            cur.execute("SELECT viewer_allowed FROM inventory.app_config LIMIT 1;")
+            viewer_allowed = cur.fetchone()
+            viewer_allowed = viewer_allowed and viewer_allowed[0]
+
+            cur.execute("""
+                SELECT 
+                    u.id,
+                    u.email,
+                    p.raw_user_meta_data->'app_metadata'->>'first_name',
+                    p.raw_user_meta_data->'app_metadata'->>'last_name',
+                    u.encrypted_password,
+                    u.role
+                FROM auth.users u
+                LEFT JOIN auth.user_profiles p ON u.id = p.user_id
+                WHERE u.email = %s
+            """, (email,))
+            row = cur.fetchone()
+            cur.close()
 
 
         if row:
@@ -77,12 +78,9 @@ def login(database_id=None):
 
         else:
             logger.info("No user found for email: %s", email)
-            cur.close()
             return jsonify({"error": "No user found with this email"}), 403
 
 
-        cur.close()
-
         # 🔹 Validation mot de passe
         if use_crypto:
             valid = bcrypt.checkpw(password.encode(), db_password.encode())
@@ -133,13 +131,6 @@ def login(database_id=None):
         logger.exception("Login failed for user %s", email)
         return jsonify({"error": "Login failed"}), 500
 
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception:
-                pass
-
 
 def verify(database_id=None):
     data = request.get_json(force=True) or {}
@@ -210,26 +201,26 @@ def signup(database_id=None):
     if not first_name or not last_name:
         return jsonify({"error": "First name and last name required"}), 400
 
-    conn = None
     try:
-        conn = get_conn(database_id)
-        cur = conn.cursor()
-        cur.execute(f'SET ROLE "{DBUSER}";')
-        cur.execute("BEGIN;")
-        cur.execute("SAVEPOINT sp_signup;")
+        # 🔹 Connexion empruntée au pool (rollback automatique en cas d'erreur)
+        with get_conn(database_id) as conn:
+            cur = conn.cursor()
+            cur.execute(f'SET ROLE "{DBUSER}";')
+            cur.execute("BEGIN;")
+            cur.execute("SAVEPOINT sp_signup;")
 
-        cur.execute("""
-            SELECT person_id, organization_id, created_user_id
-            FROM inventory.create_account(
-                %s::text, %s::text, %s::text, %s::text, %s::text, %s::text, %s::text, %s::text
-            )
-        """, (first_name, last_name, email, phone, organization, address, role, password))
+            cur.execute("""
+                SELECT person_id, organization_id, created_user_id
+                FROM inventory.create_account(
+                    %s::text, %s::text, %s::text, %s::text, %s::text, %s::text, %s::text, %s::text
+                )
+            """, (first_name, last_name, email, phone, organization, address, role, password))
 
-        person_id, organization_id, created_user_id = cur.fetchone()
+            person_id, organization_id, created_user_id = cur.fetchone()
 
 
-        cur.execute("RELEASE SAVEPOINT sp_signup;")
-        conn.commit()
+            cur.execute("RELEASE SAVEPOINT sp_signup;")
+            conn.commit()
 
         # 🔹 Génération du JWT
         now = datetime.now(timezone.utc)
@@ -264,12 +255,6 @@ def signup(database_id=None):
         }), 200
 
     except Exception as e:
-        if conn:
-            conn.rollback()
         logger.exception("❌ Signup failed")
         return jsonify({"error": str(e)}), 500
 
-    finally:
-        if conn:
-            conn.close()
-
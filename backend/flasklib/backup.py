@@ -1,17 +1,17 @@
 import os
 import logging
 import subprocess
-import json
 import jwt
-import psycopg
-from flask import request, Response
+from flask import request
 from flask_cors import cross_origin
 from datetime import datetime, timedelta
 from dateutil import parser
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 from .utils import get_drive_folder_id, get_drive_service, DriveFolderType
-from .db import get_db_config
+from .db import get_conn, get_db_config
+from .json_encoder import json_response
+from .admission import admit
 from flasklib.rotate_backups import rotate_backups
 import flasklib.config as config
 from flasklib.config import TABLES, get_jwt_audience
@@ -23,6 +23,7 @@ BACKUP_PREFIX = "backup"
 def register_routes(app):
     @app.route("/backup/<database_id>", methods=["POST"])
     @cross_origin(origins=config.ALLOWED_ORIGINS, supports_credentials=True)
+    @admit("heavy")
     def backup_database(database_id):
         dump_file = None
         try:
@@ -30,13 +31,13 @@ def register_routes(app):
             auth_header = request.headers.get("Authorization", "")
             token = auth_header.split(" ")[1] if " " in auth_header else None
             if not token:
-                return Response(json.dumps({"error": "No token provided"}), status=401, mimetype="application/json")
+                return json_response({"error": "No token provided"}, 401)
 
             audience = get_jwt_audience(database_id)
             decoded = jwt.decode(token, config.JWT_SECRET, algorithms=["HS256"], audience=audience)
             role = decoded.get("app_metadata", {}).get("role")
             if role not in ["admin", "dev"]:
-                return Response(json.dumps({"error": "Forbidden"}), status=403, mimetype="application/json")
+                return json_response({"error": "Forbidden"}, 403)
             
             # 🔹 DB config & Drive folder
             db_cfg = get_db_config(database_id)
@@ -44,14 +45,7 @@ def register_routes(app):
 
             # 🔹 Check si backup nécessaire
             try:
-                with psycopg.connect(
-                    host=db_cfg["host"],
-                    port=db_cfg["port"],
-                    user=db_cfg["user"],
-                    password=db_cfg["password"],
-                    dbname=db_cfg["dbname"],
-                    sslmode="require"
-                ) as conn:
+                with get_conn(database_id) as conn:
                     with conn.cursor() as cur:
                         cur.execute("SELECT last_data_export, updated_at FROM inventory.app_config WHERE id = 1")
                         row = cur.fetchone()
@@ -68,10 +62,8 @@ def register_routes(app):
                                     "⚠️ Backup skipped: last_data_export (%s) ≥ updated_at (%s) - within 1 min granularity",
                                     last_export, updated_at
                                 )
-                                return Response(
-                                    json.dumps({"status": "skipped", "reason": "Backup already up-to-date"}),
-                                    mimetype="application/json",
-                                    status=200
+                                return json_response(
+                                    {"status": "skipped", "reason": "Backup already up-to-date"}
                                 )
                         else:
                             logger.info("ℹ️ last_data_export ou updated_at est None, backup sera effectué par défaut.")
@@ -161,10 +153,9 @@ def register_routes(app):
                     user_message = f"pg_dump failed:\n{stderr_msg.strip()}"
 
                 logger.error("pg_dump failed:\n%s", stderr_msg)
-                return Response(
-                    json.dumps({"error": user_message}),
-                    status=500,
-                    mimetype="application/json"
+                return json_response(
+                    {"error": user_message},
+                    status=500
                 )
 
             # 🔹 Upload sur Google Drive
@@ -183,14 +174,7 @@ def register_routes(app):
 
             # 🔹 Mise à jour de last_data_export dans app_config
             try:
-                with psycopg.connect(
-                    host=db_cfg["host"],
-                    port=db_cfg["port"],
-                    user=db_cfg["user"],
-                    password=db_cfg["password"],
-                    dbname=db_cfg["dbname"],
-                    sslmode="require"
-                ) as conn:
+                with get_conn(database_id) as conn:
                     with conn.cursor() as cur:
                         cur.execute(
                             """
@@ -215,45 +199,40 @@ def register_routes(app):
             except Exception as e:
                 logger.warning("⚠️ Backup rotation failed: %s", e)
                 
-            return Response(json.dumps({"status": "success", "file": file.get("name"), "id": file.get("id")}), mimetype="application/json")
+            return json_response({"status": "success", "file": file.get("name"), "id": file.get("id")})
 
         except FileNotFoundError as e:
             # Cas où le dossier Google Drive ou le token n'existe pas
             logger.error("❌ %s", e)
-            return Response(
-                json.dumps({"error": f"Google Drive folder or token not found: {e}"}),
-                status=404,
-                mimetype="application/json"
+            return json_response(
+                {"error": f"Google Drive folder or token not found: {e}"},
+                status=404
             )
 
         except HttpError as e:
             logger.exception("Google Drive upload failed")
-            return Response(
-                json.dumps({"error": f"Google Drive API error: {e}"}),
-                status=e.resp.status,
-                mimetype="application/json"
+            return json_response(
+                {"error": f"Google Drive API error: {e}"},
+                status=e.resp.status
             )
 
         except jwt.ExpiredSignatureError:
-            return Response(
-                json.dumps({"error": "Token expired"}),
-                status=401,
-                mimetype="application/json"
+            return json_response(
+                {"error": "Token expired"},
+                status=401
             )
 
         except jwt.InvalidTokenError as e:
-            return Response(
-                json.dumps({"error": f"Invalid token: {e}"}),
-                status=401,
-                mimetype="application/json"
+            return json_response(
+                {"error": f"Invalid token: {e}"},
+                status=401
             )
 
         except Exception as e:
             logger.exception("Unexpected error")
-            return Response(
-                json.dumps({"error": f"Unexpected error: {str(e)}"}),
-                status=500,
-                mimetype="application/json"
+            return json_response(
+                {"error": f"Unexpected error: {str(e)}"},
+                status=500
             )
 
         finally:
@@ -1,13 +1,13 @@
 import os
 import logging
-import json
 import re
-from flask import request, Response
+from flask import request
 from flask_cors import cross_origin
 import jwt
 from datetime import datetime
 from googleapiclient.errors import HttpError
 from .utils import get_drive_folder_id, get_drive_service, DriveFolderType
+from .json_encoder import json_response
 import flasklib.config as config
 from flasklib.config import get_jwt_audience
 
@@ -26,14 +26,14 @@ def register_routes(app):
             token = auth_header.split(" ")[1] if " " in auth_header else None
             if not token:
                 logger.warning("❌ No token provided")
-                return Response(json.dumps({"error": "No token provided"}), status=401, mimetype="application/json")
+                return json_response({"error": "No token provided"}, 401)
 
             audience = get_jwt_audience(database_id)
             decoded = jwt.decode(token, config.JWT_SECRET, algorithms=["HS256"], audience=audience)
             role = decoded.get("app_metadata", {}).get("role")
             if role not in ["admin", "dev"]:
                 logger.warning("❌ Forbidden role: %s", role)
-                return Response(json.dumps({"error": "Forbidden"}), status=403, mimetype="application/json")
+                return json_response({"error": "Forbidden"}, 403)
 
             # 🔹 Récupération du dossier Drive
             folder_type = DriveFolderType.BACKUP  # On liste les backups
@@ -61,17 +61,16 @@ def register_routes(app):
                     f["backup_time"] = None
                     logger.debug("⚠️ Failed to parse timestamp from filename '%s'", name)
 
-            return Response(
-                json.dumps({"status": "success", "backups": files}),
-                mimetype="application/json"
+            return json_response(
+                {"status": "success", "backups": files}
             )
 
         except jwt.ExpiredSignatureError:
             logger.warning("❌ Token expired")
-            return Response(json.dumps({"error": "Token expired"}), status=401, mimetype="application/json")
+            return json_response({"error": "Token expired"}, 401)
         except jwt.InvalidTokenError as e:
             logger.warning("❌ Invalid token: %s", e)
-            return Response(json.dumps({"error": str(e)}), status=401, mimetype="application/json")
+            return json_response({"error": str(e)}, 401)
         except HttpError as e:
             status = e.resp.status
             msg = str(e)
@@ -80,11 +79,10 @@ def register_routes(app):
             elif status == 404:
                 msg = f"Drive folder not found: {folder_id}"
             logger.error("❌ HttpError %s: %s", status, msg)
-            return Response(json.dumps({"error": msg}), status=status, mimetype="application/json")
+            return json_response({"error": msg}, status)
         except Exception as e:
             logger.exception("❌ Backup list failed for database %s", database_id)
-            return Response(
-                json.dumps({"status": "error", "error": f"Unexpected error: {str(e)}"}),
-                status=500,
-                mimetype="application/json"
+            return json_response(
+                {"status": "error", "error": f"Unexpected error: {str(e)}"},
+                status=500
             )
@@ -0,0 +1,96 @@
+import logging
+import zlib
+from flask import request
+import flasklib.config as config
+
+try:
+    import brotli
+except ImportError:  # brotli facultatif : gzip seul sinon
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Compression négociée des réponses (Accept-Encoding : br, gzip)
+#
+# - réponses complètes : compressées d'un bloc au-delà de COMPRESS_MIN_SIZE octets ;
+# - réponses en flux (/rpc ?stream=...) : chaque morceau est compressé puis vidé
+#   (flush) pour que le client reçoive les lignes au fil de l'eau ;
+# - images déjà compressées (JPEG, PNG, GIF, WEBP...) : envoyées telles quelles.
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "image/bmp",
+    "image/x-icon",
+)
+
+
+def _is_compressible(mimetype):
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _choose_encoding():
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offers)
+
+
+def _compressor(encoding):
+    """Renvoie (compress(chunk) -> bytes vidés, finish() -> bytes restants)."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=config.COMPRESS_BROTLI_QUALITY)
+        return (lambda chunk: c.process(chunk) + c.flush()), c.finish
+    c = zlib.compressobj(config.COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 : en-tête gzip
+    return (lambda chunk: c.compress(chunk) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+def _compress_stream(chunks, encoding):
+    compress, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield compress(chunk)
+        yield finish()
+    finally:
+        # Fermeture du flux d'origine (curseur serveur, fichier...) même si le client coupe
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if not config.COMPRESS_ENABLED or request.method == "HEAD":
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if "Content-Encoding" in response.headers or not _is_compressible(response.mimetype or ""):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config.COMPRESS_MIN_SIZE:
+            return response
+        compress, finish = _compressor(encoding)
+        response.set_data(compress(data) + finish())
+
+    response.headers["Content-Encoding"] = encoding
+    # Le corps envoyé n'est plus octet pour octet celui de l'ETag : validateur faible
+    tag, weak = response.get_etag()
+    if tag and not weak:
+        response.set_etag(tag, weak=True)
+    return response
+
+
+def register_hooks(app):
+    app.after_request(compress_response)
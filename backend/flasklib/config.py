@@ -3,6 +3,7 @@ import json
 import logging
 import sys
 from zoneinfo import ZoneInfo  # Python 3.9+
+from flask import abort
 
 DEBUG = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true")
 
@@ -28,6 +29,82 @@ DBUSER = os.environ.get("DBUSER")
 DBNAME = os.environ.get("DBNAME")
 DBPORT = int(os.environ.get("DB_PORT", 5432))
 
+# 🔹 Pool de connexions (valeurs par défaut, surchargeables par base via la clé "pool" de databases.json)
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 5))
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 300))         # secondes avant fermeture d'une connexion inutilisée
+DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)) # secondes avant recyclage d'une connexion
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 15))            # attente max d'une connexion libre
+DB_POOL_CHECK_AFTER = float(os.environ.get("DB_POOL_CHECK_AFTER", 30))    # health check si inactive depuis plus longtemps
+DB_CONNECT_ATTEMPTS = int(os.environ.get("DB_CONNECT_ATTEMPTS", 3))           # tentatives d'ouverture d'une connexion
+DB_CONNECT_BACKOFF = float(os.environ.get("DB_CONNECT_BACKOFF", 0.2))         # base du backoff exponentiel (s)
+DB_CONNECT_BACKOFF_MAX = float(os.environ.get("DB_CONNECT_BACKOFF_MAX", 2))   # plafond entre deux tentatives (s)
+DB_BREAKER_THRESHOLD = int(os.environ.get("DB_BREAKER_THRESHOLD", 3))         # connexions échouées (toutes tentatives faites) avant ouverture
+DB_BREAKER_PROBE_MAX = float(os.environ.get("DB_BREAKER_PROBE_MAX", 30))      # plafond entre deux sondes (s)
+DB_BREAKER_PROBE_TIMEOUT = float(os.environ.get("DB_BREAKER_PROBE_TIMEOUT", 10))
+DB_POOL_PER_ROLE = os.environ.get("DB_POOL_PER_ROLE", "0").lower() in ("1", "true")  # sous-pools par rôle RLS
+DB_POOL_ROLE_MAX_SIZE = int(os.environ.get("DB_POOL_ROLE_MAX_SIZE", 2))  # plafond d'un sous-pool par rôle (s'ajoute au pool partagé)
+DB_READ_AFTER_WRITE_DELAY = float(os.environ.get("DB_READ_AFTER_WRITE_DELAY", 5))  # lectures sur le primaire après une écriture (s)
+
+# 🔹 Cache des prototypes RPC : intervalle (s) de vérification de app_config.schema_version
+PROTOTYPE_CACHE_TTL = float(os.environ.get("PROTOTYPE_CACHE_TTL", 60))
+
+# 🔹 Nombre maximal d'appels dans un lot /rpc/<base>/batch
+RPC_BATCH_MAX_CALLS = int(os.environ.get("RPC_BATCH_MAX_CALLS", 50))
+
+# 🔹 Streaming RPC (?stream=1 / ndjson) : nombre de lignes lues par FETCH sur le curseur serveur
+RPC_STREAM_CHUNK_ROWS = int(os.environ.get("RPC_STREAM_CHUNK_ROWS", 500))
+
+# 🔹 Budget de temps des appels RPC (cf. flasklib/deadline.py, surchargeable par la clé "timeouts" de databases.json)
+RPC_STATEMENT_TIMEOUT = float(os.environ.get("RPC_STATEMENT_TIMEOUT", 30))      # budget par défaut (s, 0 = illimité)
+RPC_FUNCTION_TIMEOUTS = {                                                        # budgets par fonction (s)
+    "get_availability": 60,
+    "get_planning_matrix": 60,
+    **json.loads(os.environ.get("RPC_FUNCTION_TIMEOUTS", "{}")),
+}
+RPC_CANCEL_GRACE = float(os.environ.get("RPC_CANCEL_GRACE", 2))                 # délai (s) avant annulation forcée après le budget
+
+# 🔹 Cache des réponses RPC des fonctions STABLE/IMMUTABLE (cf. flasklib/rpc_cache.py)
+RPC_CACHE_ENABLED = os.environ.get("RPC_CACHE_ENABLED", "1").lower() in ("1", "true")
+RPC_CACHE_MAX_ENTRIES = int(os.environ.get("RPC_CACHE_MAX_ENTRIES", 256))
+RPC_CACHE_MAX_BYTES = int(os.environ.get("RPC_CACHE_MAX_MB", 64)) * 1024 * 1024
+RPC_CACHE_MAX_AGE = float(os.environ.get("RPC_CACHE_MAX_AGE", 300))                # durée de vie max d'une réponse (s)
+# Confiance dans le filigrane (s) : une écriture d'un autre worker peut rester invisible
+# jusqu'à ce délai, y compris via le niveau disque partagé (0 = relu à chaque appel)
+RPC_CACHE_WATERMARK_TTL = float(os.environ.get("RPC_CACHE_WATERMARK_TTL", 5))
+RPC_CACHE_DIR = os.environ.get("RPC_CACHE_DIR", "")                                # niveau disque partagé (vide = désactivé)
+
+# 🔹 Coalescence des lectures RPC identiques simultanées (cf. flasklib/single_flight.py)
+RPC_SINGLE_FLIGHT_ENABLED = os.environ.get("RPC_SINGLE_FLIGHT_ENABLED", "1").lower() in ("1", "true")
+RPC_SINGLE_FLIGHT_WAIT = float(os.environ.get("RPC_SINGLE_FLIGHT_WAIT", 30))      # attente max d'un appel en cours (s)
+
+# 🔹 Préchauffage des bases (cf. flasklib/warmup.py ; "keep_warm": false dans databases.json pour exclure une base)
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1").lower() in ("1", "true")
+WARMUP_PRELOAD_PROTOTYPES = os.environ.get("WARMUP_PRELOAD_PROTOTYPES", "1").lower() in ("1", "true")
+KEEP_WARM_INTERVAL = float(os.environ.get("KEEP_WARM_INTERVAL", 240))    # secondes entre deux réveils (0 = démarrage seul)
+WARMUP_COLD_AFTER = float(os.environ.get("WARMUP_COLD_AFTER", 300))      # base considérée froide après (s) sans connexion
+
+# 🔹 Contrôle d'admission par base (cf. flasklib/admission.py, surchargeable par la clé "limits" de databases.json)
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "1").lower() in ("1", "true")
+ADMISSION_RPC_CONCURRENCY = int(os.environ.get("ADMISSION_RPC_CONCURRENCY", 8))     # appels RPC simultanés
+ADMISSION_RPC_QUEUE = int(os.environ.get("ADMISSION_RPC_QUEUE", 32))                # appels en attente au plus
+ADMISSION_RPC_TIMEOUT = float(os.environ.get("ADMISSION_RPC_TIMEOUT", 10))          # attente max (s) avant 503
+ADMISSION_HEAVY_CONCURRENCY = int(os.environ.get("ADMISSION_HEAVY_CONCURRENCY", 2)) # backup/restore/upload
+ADMISSION_HEAVY_QUEUE = int(os.environ.get("ADMISSION_HEAVY_QUEUE", 4))
+ADMISSION_HEAVY_TIMEOUT = float(os.environ.get("ADMISSION_HEAVY_TIMEOUT", 5))
+ADMISSION_PHOTO_CONCURRENCY = int(os.environ.get("ADMISSION_PHOTO_CONCURRENCY", 4)) # miniatures Drive
+ADMISSION_PHOTO_QUEUE = int(os.environ.get("ADMISSION_PHOTO_QUEUE", 16))
+ADMISSION_PHOTO_TIMEOUT = float(os.environ.get("ADMISSION_PHOTO_TIMEOUT", 10))
+
+# 🔹 Sérialiseur JSON des réponses : "orjson" (rapide, si installé) ou "json" (module standard)
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson").lower()
+
+# 🔹 Compression des réponses (cf. flasklib/compression.py)
+COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1").lower() in ("1", "true")
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))                 # octets, réponses complètes
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+
 
 # CORS allowed origins
 ALLOWED_ORIGINS = [
@@ -1,9 +1,9 @@
 import os
 import logging
 import json
-from flask import Response
 from flask_cors import cross_origin
 import flasklib.config as config
+from .json_encoder import json_response
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +25,7 @@ def register_routes(app):
 
             if not os.path.exists(json_path):
                 logger.error("❌ databases.json not found at %s", json_path)
-                return Response(json.dumps({"error": "databases.json not found"}), status=404, mimetype="application/json")
+                return json_response({"error": "databases.json not found"}, 404)
 
             with open(json_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
@@ -34,15 +34,14 @@ def register_routes(app):
             databases = [{"baseid": d.get("baseid"), "basename": d.get("basename")} for d in data]
 
             logger.debug("✅ %d databases found", len(databases))
-            return Response(
-                json.dumps({"status": "success", "databases": databases}, ensure_ascii=False, indent=2),
-                mimetype="application/json"
+            return json_response(
+                {"status": "success", "databases": databases},
+                pretty=True
             )
 
         except Exception as e:
             logger.exception("❌ list_databases failed")
-            return Response(
-                json.dumps({"status": "error", "error": f"Unexpected error: {str(e)}"}),
-                status=500,
-                mimetype="application/json"
+            return json_response(
+                {"status": "error", "error": f"Unexpected error: {str(e)}"},
+                status=500
             )
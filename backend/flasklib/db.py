@@ -1,81 +1,418 @@
+import atexit
 import logging
+import math
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 import psycopg
-from psycopg.errors import OperationalError
+from psycopg_pool import ConnectionPool, PoolTimeout
 from flask import jsonify
 import os
 
 from .types import get_sql_value
+import flasklib.config as config
 from .config import get_db_config  # <-- import depuis config.py
 
 logger = logging.getLogger(__name__)
 
 DEBUG = os.environ.get("FLASK_DEBUG", "0") in ("1", "true", "True")
 
+# 🔹 Un pool par baseid (et un pool "lecture" si read_host est défini), créé à la première utilisation
+_pools = {}
+_pools_lock = threading.Lock()
 
-def get_conn(database_id: str = "BASETEST_AD"):
+# 🔹 Dernière écriture faite par ce process sur chaque base (lecture sur le primaire juste après)
+_last_write = {}
+
+# 🔹 Dernier emprunt de connexion réussi par base (horodatage, pour l'état warm/cold de /health)
+_last_activity = {}
+
+# 🔹 Dernière restitution au pool de chaque connexion (pour espacer les health checks)
+_last_used = weakref.WeakKeyDictionary()
+
+# 🔹 Rôle fixé à l'ouverture des connexions des pools par rôle (cf. get_pool(role=...))
+_fixed_roles = weakref.WeakKeyDictionary()
+
+# 🔹 Rôles RLS vérifiés dans pg_roles, par (baseid, rôle), avant de leur créer un pool
+_known_roles = {}
+
+
+def build_dsn(cfg: dict) -> str:
     """
-    Ouvre une connexion PostgreSQL à partir de databases.json
+    Construit le DSN PostgreSQL d'une base de databases.json
     """
-    logger.debug("🔹 get_conn called for database_id=%s", database_id)
-    try:
-        cfg = get_db_config(database_id)
-        logger.debug(f"config: {cfg}")
-        logger.debug(
-            "🔹 DB config: host=%s, dbname=%s, user=%s, password=%s",
-            cfg["host"], cfg["dbname"], cfg["user"], "***" if cfg["password"] else None
-        )
-
-        endpoint_id = cfg["host"].split(".")[0] if cfg["host"] else "unknown"
-
-        # Détection automatique du provider Neon
-        host = cfg["host"].lower()
-        is_neon = "neon.tech" in host or "neon.build" in host
-
-        # Port : Neon et Alwaysdata utilisent 5432
-        port = int(cfg.get("port", 5432))
-
-        # Construction du DSN
-        dsn = (
-            f"postgresql://{cfg['user']}:{cfg['password']}@{cfg['host']}:{port}/{cfg['dbname']}?sslmode=require"
-        )
-
-        # Ajout d’une option spécifique Neon (endpoint)
-        if is_neon:
-            dsn += f"&options=endpoint%3D{endpoint_id}"
-
-        # Timeout universel
-        dsn += "&connect_timeout=10"
-
-        logger.debug("🔹 DSN constructed: %s", dsn.replace(cfg["password"], "***"))
-
-        # Tentative de connexion
-        try:
-            conn = psycopg.connect(dsn, autocommit=True)
-            logger.debug("✅ Connection established")
-
-        except OperationalError as oe:
-            msg_text = str(oe)
-            if "password authentication failed" in msg_text:
-                logger.error("❌ Password authentication failed for user %s", cfg['user'])
-                raise RuntimeError(f"Password authentication failed for user {cfg['user']}")
-            else:
-                msg = msg_text.split("\n")[0]
-                logger.error("❌ Database connection failed: %s", msg)
-                raise RuntimeError(f"Database connection failed: {msg}")
-
-        except Exception as conn_ex:
-            raise RuntimeError(f"Unexpected connection error: {str(conn_ex)}") from conn_ex
-
-        # Définir le paramètre app.debug côté serveur
+    endpoint_id = cfg["host"].split(".")[0] if cfg["host"] else "unknown"
+
+    # Détection automatique du provider Neon
+    host = cfg["host"].lower()
+    is_neon = "neon.tech" in host or "neon.build" in host
+
+    # Port : Neon et Alwaysdata utilisent 5432
+    port = int(cfg.get("port", 5432))
+    sslmode = cfg.get("sslmode", "require")
+
+    # Construction du DSN
+    dsn = (
+        f"postgresql://{cfg['user']}:{cfg['password']}@{cfg['host']}:{port}/{cfg['dbname']}?sslmode={sslmode}"
+    )
+
+    # Ajout d’une option spécifique Neon (endpoint)
+    if is_neon:
+        dsn += f"&options=endpoint%3D{endpoint_id}"
+
+    # Timeout universel
+    dsn += "&connect_timeout=10"
+
+    logger.debug("🔹 DSN constructed: %s", dsn.replace(cfg["password"], "***"))
+    return dsn
+
+
+def _pool_settings(cfg: dict, role: str = None) -> dict:
+    """
+    Paramètres du pool : valeurs de config.py surchargées par la clé "pool" de databases.json.
+    Un sous-pool par rôle est plafonné à "role_max_size" (DB_POOL_ROLE_MAX_SIZE) connexions :
+    il s'ajoute au pool partagé, chaque rôle multiplie donc les connexions ouvertes.
+    """
+    overrides = cfg.get("pool") or {}
+    settings = {
+        "min_size": int(overrides.get("min_size", config.DB_POOL_MIN_SIZE)),
+        "max_size": int(overrides.get("max_size", config.DB_POOL_MAX_SIZE)),
+        "max_idle": float(overrides.get("max_idle", config.DB_POOL_MAX_IDLE)),
+        "max_lifetime": float(overrides.get("max_lifetime", config.DB_POOL_MAX_LIFETIME)),
+        "timeout": float(overrides.get("timeout", config.DB_POOL_TIMEOUT)),
+    }
+    if role:
+        settings["max_size"] = min(settings["max_size"],
+                                   int(overrides.get("role_max_size", config.DB_POOL_ROLE_MAX_SIZE)))
+        settings["min_size"] = min(settings["min_size"], settings["max_size"])
+    return settings
+
+
+def _session_configurer(cfg: dict, role: str = None):
+    """
+    Retourne le callback appliqué une seule fois à chaque nouvelle connexion du pool :
+    app.debug + éventuels "session_settings" de databases.json
+    (+ SET ROLE pour un pool par rôle).
+    """
+    settings = {"app.debug": "true" if DEBUG else "false"}
+    settings.update({k: str(v) for k, v in (cfg.get("session_settings") or {}).items()})
+    sql = "SELECT " + ", ".join(["set_config(%s, %s, false)"] * len(settings)) + ";"
+    args = [item for pair in settings.items() for item in pair]
+
+    def configure(conn):
+        conn.autocommit = True
         with conn.cursor() as cur:
-            cur.execute(f"SET app.debug = {'true' if DEBUG else 'false'};")
-            logger.debug("🔹 SET app.debug executed")
+            cur.execute(sql, args)
+            if role:
+                cur.execute(psycopg.sql.SQL("SET ROLE {};").format(psycopg.sql.Identifier(role)))
+                _fixed_roles[conn] = role
+        logger.debug("🔹 Session settings applied: %s (role=%s)", settings, role)
+
+    return configure
+
+
+def _check_conn(conn):
+    """Health check avant prêt, uniquement si la connexion est restée inactive un moment."""
+    last_used = _last_used.get(conn)
+    if last_used is not None and time.monotonic() - last_used < config.DB_POOL_CHECK_AFTER:
+        return
+    ConnectionPool.check_connection(conn)
+
+
+def _reset_conn(conn):
+    """Remet la connexion dans un état neutre avant son retour au pool."""
+    conn.autocommit = True
+    if conn not in _fixed_roles:
+        conn.execute("RESET ROLE;")
+    _last_used[conn] = time.monotonic()
+
+
+def fixed_role(conn):
+    """Rôle fixé sur la connexion (pool par rôle), sinon None."""
+    return _fixed_roles.get(conn)
+
+
+def _per_role_enabled(cfg: dict) -> bool:
+    """
+    Pools par rôle RLS ("pool": {"per_role": true} de databases.json ou DB_POOL_PER_ROLE).
+    Jamais derrière un PgBouncer en mode transaction (endpoints "-pooler" de Neon) :
+    un SET ROLE de session n'y reste pas attaché à la connexion serveur.
+    """
+    enabled = (cfg.get("pool") or {}).get("per_role", config.DB_POOL_PER_ROLE)
+    return bool(enabled) and "-pooler" not in (cfg.get("host") or "")
+
+
+def role_exists(database_id: str, role: str) -> bool:
+    """
+    Vrai si le rôle existe dans la base et que l'utilisateur de connexion peut le prendre.
+    Vérifié une seule fois par base et par rôle, sur le pool partagé : un pool dont le
+    SET ROLE échoue ne fournirait jamais de connexion.
+    """
+    key = (database_id, role)
+    if key not in _known_roles:
+        with get_conn(database_id) as conn:
+            row = conn.execute(
+                "SELECT pg_has_role(oid, 'MEMBER') FROM pg_roles WHERE rolname = %s;", (role,)
+            ).fetchone()
+        _known_roles[key] = bool(row and row[0])
+        if not _known_roles[key]:
+            logger.warning("⚠️ Role %s unknown or not granted on %s: shared pool used", role, database_id)
+    return _known_roles[key]
+
+
+def _read_config(cfg: dict):
+    """Configuration du réplica de lecture ("read_host" / "read_port" de databases.json), ou None."""
+    if not cfg.get("read_host"):
+        return None
+    return {**cfg, "host": cfg["read_host"], "port": cfg.get("read_port", cfg.get("port", 5432))}
+
+
+def get_pool(database_id: str, read: bool = False, role: str = None) -> ConnectionPool:
+    """
+    Renvoie (et crée au premier appel) le pool de connexions de la base database_id.
+    read=True : pool du réplica de lecture, s'il est configuré (sinon le pool principal).
+    role      : sous-pool dont les connexions ont ce rôle fixé, si les pools par rôle
+                sont activés pour la base et que le rôle existe (sinon le pool partagé,
+                où le préambule RLS prend le rôle et signale un rôle inconnu).
+    """
+    key = database_id + (":read" if read else "") + (f"@{role}" if role else "")
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    cfg = get_db_config(database_id)
+    if role and not (_per_role_enabled(cfg) and role_exists(database_id, role)):
+        return get_pool(database_id, read)
+    if read:
+        cfg = _read_config(cfg)
+        if cfg is None:
+            return get_pool(database_id, role=role)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = _pool_settings(cfg, role)
+            logger.info("🔹 Creating %sconnection pool for %s%s: %s", "read " if read else "", database_id,
+                        f" (role {role})" if role else "", settings)
+            name = f"pool-{key.replace(':', '-').replace('@', '-')}"
+            dsn = build_dsn(cfg)
+            pool = ConnectionPool(
+                dsn,
+                name=name,
+                connection_class=_retrying_connection(_breaker(name, dsn)),
+                kwargs={"autocommit": True},
+                configure=_session_configurer(cfg, role),
+                check=_check_conn,
+                reset=_reset_conn,
+                open=True,
+                **settings
+            )
+            _pools[key] = pool
+    return pool
+
+
+def note_write(database_id: str):
+    """Signale une écriture : les lectures suivantes restent un moment sur le primaire (réplica en retard)."""
+    _last_write[database_id] = time.monotonic()
+
+
+def _use_read_pool(database_id: str) -> bool:
+    last_write = _last_write.get(database_id)
+    return last_write is None or time.monotonic() - last_write > config.DB_READ_AFTER_WRITE_DELAY
+
+
+class DatabaseUnavailable(RuntimeError):
+    """Base injoignable (pool épuisé ou disjoncteur ouvert) : à renvoyer en 503 + Retry-After."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
 
-        return conn
 
-    except Exception as e:
-        logger.exception("❌ get_conn failed for database_id=%s", database_id)
+class CircuitBreaker:
+    """
+    Disjoncteur d'un pool de connexions : un pool en échec (sous-pool d'un rôle, réplica)
+    n'ouvre pas celui des autres pools de la même base.
+
+    Seules les connexions au serveur qui échouent comptent (après leurs DB_CONNECT_ATTEMPTS
+    tentatives) : un pool saturé n'est pas une panne. Après DB_BREAKER_THRESHOLD échecs
+    consécutifs, il s'ouvre : les
+    demandes de connexion échouent aussitôt, sans occuper de thread pendant le
+    timeout du pool. Un thread de fond sonde alors le serveur (backoff exponentiel
+    avec gigue) et referme le disjoncteur dès qu'une connexion aboutit.
+    """
+
+    def __init__(self, label, conninfo):
+        self.label = label
+        self.conninfo = conninfo
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def check(self):
+        if self.opened_at is not None:
+            raise DatabaseUnavailable(f"Database unavailable ({self.label}, circuit open)",
+                                      max(1, int(config.DB_BREAKER_PROBE_MAX)))
+
+    def success(self):
+        self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None or self.failures < config.DB_BREAKER_THRESHOLD:
+                return
+            self.opened_at = time.monotonic()
+        logger.error("🔌 Circuit opened for %s after %d failed connects", self.label, self.failures)
+        threading.Thread(target=self._probe, name=f"probe-{self.label}", daemon=True).start()
+
+    def _probe(self):
+        attempt = 0
+        while True:
+            time.sleep(backoff_delay(attempt, config.DB_BREAKER_PROBE_MAX))
+            attempt += 1
+            try:
+                with psycopg.connect(self.conninfo, connect_timeout=int(config.DB_BREAKER_PROBE_TIMEOUT)) as conn:
+                    conn.execute("SELECT 1;")
+            except Exception as e:
+                logger.debug("🔌 Probe %d failed for %s: %s", attempt, self.label, e)
+                continue
+            with self._lock:
+                self.failures = 0
+                self.opened_at = None
+            logger.info("🔌 Circuit closed for %s after %d probe(s)", self.label, attempt)
+            return
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker(name: str, conninfo: str) -> CircuitBreaker:
+    """Disjoncteur du pool name (créé au premier appel)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name, conninfo))
+    return breaker
+
+
+def breaker_state(database_id: str) -> str:
+    """"open" si l'un des pools de la base est déclaré injoignable, sinon "closed"."""
+    pools = [pool for key, pool in list(_pools.items())
+             if key == database_id or key.startswith((f"{database_id}:", f"{database_id}@"))]
+    return "open" if any(_breakers.get(p.name) and _breakers[p.name].is_open for p in pools) else "closed"
+
+
+def backoff_delay(attempt: int, cap: float) -> float:
+    """Backoff exponentiel avec gigue complète : uniforme entre 0 et min(cap, base * 2^attempt)."""
+    return random.uniform(0, min(cap, config.DB_CONNECT_BACKOFF * (2 ** attempt)))
+
+
+def _retrying_connection(breaker: CircuitBreaker):
+    """
+    Classe de connexion du pool : l'ouverture d'une connexion est retentée jusqu'à
+    DB_CONNECT_ATTEMPTS fois, espacées d'un backoff avec gigue (redémarrage de Neon,
+    coupure réseau brève). Un échec après toutes les tentatives compte pour le disjoncteur.
+    """
+
+    class RetryingConnection(psycopg.Connection):
+        @classmethod
+        def connect(cls, conninfo="", **kwargs):
+            attempts = max(1, config.DB_CONNECT_ATTEMPTS)
+            for attempt in range(attempts):
+                try:
+                    conn = super().connect(conninfo, **kwargs)
+                except psycopg.OperationalError as e:
+                    logger.warning("⚠️ Connect attempt %d/%d failed for %s: %s",
+                                   attempt + 1, attempts, breaker.label, e)
+                    if attempt + 1 == attempts:
+                        breaker.failure()
+                        raise
+                    time.sleep(backoff_delay(attempt, config.DB_CONNECT_BACKOFF_MAX))
+                else:
+                    breaker.success()
+                    return conn
+
+    return RetryingConnection
+
+
+def _acquire(database_id: str, pool: ConnectionPool):
+    """
+    Emprunte une connexion au pool ; échec immédiat si le disjoncteur est ouvert.
+    Les reconnexions sont faites par le pool (cf. _retrying_connection) : un PoolTimeout
+    signifie un pool saturé ou une base qui ne répond pas, sans compter comme une panne.
+    """
+    breaker = _breaker(pool.name, pool.conninfo)
+    breaker.check()
+    try:
+        return pool.getconn()
+    except PoolTimeout as e:
+        breaker.check()
+        logger.warning("⚠️ No free connection in %s after %.0fs: %s", pool.name, pool.timeout, e)
+        raise DatabaseUnavailable(f"Database {database_id} busy: no free connection",
+                                  max(1, math.ceil(pool.timeout))) from e
+
+
+@contextmanager
+def get_conn(database_id: str = "BASETEST_AD", read: bool = False, role: str = None):
+    """
+    Emprunte une connexion au pool de la base database_id.
+    La connexion est rendue au pool (rôle réinitialisé) en sortie de bloc :
+
+        with get_conn(database_id) as conn:
+            ...
+
+    read=True : lecture seule, servie par le réplica "read_host" s'il existe.
+    role      : connexion du sous-pool de ce rôle RLS (cf. fixed_role), si activé.
+    """
+    logger.debug("🔹 get_conn called for database_id=%s (read=%s, role=%s)", database_id, read, role)
+    pool = get_pool(database_id, read and _use_read_pool(database_id), role)
+    try:
+        conn = _acquire(database_id, pool)
+    except DatabaseUnavailable as e:
+        logger.error("❌ No database connection available for %s: %s", database_id, e)
         raise
+    try:
+        # Même comportement que pool.connection() : COMMIT/ROLLBACK en sortie, puis retour au pool
+        with conn:
+            yield conn
+        _last_activity[database_id] = time.time()
+    finally:
+        pool.putconn(conn)
+
+
+def last_activity(database_id: str):
+    """Horodatage (time.time) du dernier emprunt de connexion réussi sur la base, ou None."""
+    return _last_activity.get(database_id)
+
+
+def pool_stats(database_id: str) -> dict:
+    """Taille et disponibilité des pools déjà ouverts de la base, sans en créer."""
+    stats = {}
+    for key, pool in list(_pools.items()):
+        if key == database_id or key.startswith((f"{database_id}:", f"{database_id}@")):
+            s = pool.get_stats()
+            stats[key] = {k: s.get(k, 0) for k in ("pool_size", "pool_available", "requests_waiting")}
+    return stats
+
+
+@atexit.register
+def close_pools():
+    """Ferme proprement tous les pools à l'arrêt du process."""
+    with _pools_lock:
+        for database_id, pool in _pools.items():
+            try:
+                pool.close()
+            except Exception as e:
+                logger.warning("⚠️ Failed to close pool %s: %s", database_id, e)
+        _pools.clear()
 
 
 def log_notices(conn):
@@ -97,6 +434,16 @@ def get_function_prototype(cur, function_name, schema='public'):
     if not row:
         return None
     func_name, schema_name, arguments_str, return_type = row
+    return {
+        "function_name": func_name,
+        "schema_name": schema_name,
+        "arguments": parse_arguments(arguments_str),
+        "return_type": return_type
+    }
+
+
+def parse_arguments(arguments_str):
+    """Découpe la liste d'arguments renvoyée par pg_get_function_identity_arguments()."""
     args = []
     if arguments_str:
         for arg in arguments_str.split(","):
@@ -105,9 +452,4 @@ def get_function_prototype(cur, function_name, schema='public'):
                 name = parts[0]
                 typ = " ".join(parts[1:])
                 args.append({"name": name, "type": typ})
-    return {
-        "function_name": func_name,
-        "schema_name": schema_name,
-        "arguments": args,
-        "return_type": return_type
-    }
+    return args
@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+import flasklib.config as config
+from .config import get_db_config
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Budget de temps des appels RPC
+#
+# Chaque fonction dispose d'un budget en secondes : RPC_STATEMENT_TIMEOUT par défaut,
+# RPC_FUNCTION_TIMEOUTS par fonction, surchargés par la clé "timeouts" de databases.json :
+#   "timeouts": {"default": 20, "get_availability": 45}
+# Le budget est appliqué en statement_timeout local à la transaction : PostgreSQL
+# interrompt lui-même la requête trop longue (→ 504).
+#
+# En secours, si le serveur n'a toujours pas répondu RPC_CANCEL_GRACE secondes après le
+# budget (réseau bloqué, serveur saturé), la requête est annulée côté client (cancel).
+# Un seul thread surveille les échéances de tout le processus (tas trié par échéance).
+#
+# Le départ du client HTTP n'est pas détecté : derrière le proxy TLS de Render / Vercel,
+# la socket vue par gunicorn est celle du proxy, pas celle du client. Une requête
+# abandonnée s'arrête au plus tard à la fin de son budget.
+
+STATEMENT_TIMEOUT_SQL = "SELECT set_config('statement_timeout', %s, true);"
+
+_cond = threading.Condition()
+_deadlines = []                 # tas de (échéance, n°, Watchdog)
+_sequence = itertools.count()
+_monitor_pid = None             # processus où tourne le thread de surveillance
+
+
+def budget(database_id, function_name):
+    """Budget (s) d'une fonction sur une base ; 0 = illimité."""
+    overrides = get_db_config(database_id).get("timeouts") or {}
+    if function_name in overrides:
+        return float(overrides[function_name])
+    if function_name in config.RPC_FUNCTION_TIMEOUTS:
+        return float(config.RPC_FUNCTION_TIMEOUTS[function_name])
+    return float(overrides.get("default", config.RPC_STATEMENT_TIMEOUT))
+
+
+def statement_timeout(seconds):
+    """Valeur de statement_timeout pour un budget en secondes."""
+    return f"{int(seconds * 1000)}ms" if seconds > 0 else "0"
+
+
+def _watch(watchdog):
+    """Inscrit une échéance ; lance le thread de surveillance au besoin (une fois par processus)."""
+    global _monitor_pid
+    with _cond:
+        heapq.heappush(_deadlines, (watchdog.deadline, next(_sequence), watchdog))
+        if _monitor_pid != os.getpid():
+            _monitor_pid = os.getpid()
+            threading.Thread(target=_monitor, name="rpc-deadlines", daemon=True).start()
+        _cond.notify()
+
+
+def _next_expired():
+    """Attend la prochaine échéance dépassée d'une requête encore en cours."""
+    with _cond:
+        while True:
+            # Requêtes terminées : retirées du tas quand leur échéance arrive en tête
+            while _deadlines and _deadlines[0][2].done:
+                heapq.heappop(_deadlines)
+            if not _deadlines:
+                _cond.wait()
+                continue
+            delay = _deadlines[0][0] - time.monotonic()
+            if delay <= 0:
+                return heapq.heappop(_deadlines)[2]
+            _cond.wait(delay)
+
+
+def _monitor():
+    while True:
+        _next_expired().cancel()
+
+
+class Watchdog:
+    """
+    Garde d'une requête en cours sur conn (contexte with) : annulée si elle n'a pas
+    répondu RPC_CANCEL_GRACE secondes après son budget (seconds, 0 = illimité).
+    """
+
+    def __init__(self, conn, seconds):
+        self.conn = conn
+        self.deadline = time.monotonic() + seconds + config.RPC_CANCEL_GRACE if seconds > 0 else None
+        self.done = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.deadline is not None:
+            _watch(self)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.done = True
+        return False
+
+    def cancel(self):
+        with self._lock:
+            if self.done:
+                return
+            logger.warning("⏱️ Query still running past its budget, cancelling")
+            try:
+                self.conn.cancel_safe(timeout=5)
+            except Exception as e:
+                logger.warning("⚠️ Query cancel failed: %s", e)
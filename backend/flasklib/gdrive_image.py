@@ -1,6 +1,5 @@
 import os
 import io
-import json
 from flask import request, Response, send_file
 import jwt
 from flask_cors import cross_origin
@@ -8,6 +7,8 @@ from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 from PIL import Image
 from .utils import get_drive_service
+from .json_encoder import json_response
+from .admission import admit
 from .config import logger, JWT_SECRET, get_jwt_audience, ALLOWED_ORIGINS
 
 
@@ -19,6 +20,7 @@ def register_routes(app):
         allow_headers=["Content-Type", "Authorization"],
         methods=["GET", "OPTIONS"]
     )
+    @admit("photo")
     def serve_photo(database_id, file_id):  # <-- database_id ajouté
         if request.method == "OPTIONS":
             return Response(status=200)
@@ -81,16 +83,16 @@ def register_routes(app):
             return send_file(out, mimetype=mime, download_name=filename)
 
         except jwt.ExpiredSignatureError:
-            return Response(json.dumps({
+            return json_response({
                 "error": "Token expired",
                 "drive_url": drive_url
-            }), status=401, mimetype="application/json")
+            }, status=401)
 
         except jwt.InvalidTokenError as e:
-            return Response(json.dumps({
+            return json_response({
                 "error": f"Invalid token: {str(e)}",
                 "drive_url": drive_url
-            }), status=401, mimetype="application/json")
+            }, status=401)
 
         except HttpError as e:
             status_code = e.resp.status
@@ -99,14 +101,14 @@ def register_routes(app):
                 403: f"Google Drive: access denied (id={file_id})"
             }.get(status_code, f"Google Drive error ({status_code}): {str(e)}")
             logger.warning(f"{msg} — {drive_url}")
-            return Response(json.dumps({
+            return json_response({
                 "error": msg,
                 "drive_url": drive_url
-            }), status=status_code, mimetype="application/json")
+            }, status=status_code)
 
         except Exception as e:
             logger.exception(f"Failed to serve Drive photo — {drive_url}")
-            return Response(json.dumps({
+            return json_response({
                 "error": f"Internal server error: {str(e)}",
                 "drive_url": drive_url
-            }), status=500, mimetype="application/json")
+            }, status=500)
@@ -1,22 +1,103 @@
 import json
-from datetime import datetime, date, timedelta
+import logging
+import math
+from datetime import datetime, date, time, timedelta
 from decimal import Decimal
+from flask import Response
+import flasklib.config as config
+
+try:
+    import orjson
+except ImportError:  # orjson facultatif : repli sur le module json standard
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def format_timedelta(obj):
+    """Format historique des intervalles : "2 days 03:04:05" (jours omis si nuls)."""
+    days = obj.days
+    seconds = obj.seconds
+    hours, remainder = divmod(seconds, 3600)
+    minutes, sec = divmod(remainder, 60)
+    parts = []
+    if days != 0:
+        parts.append(f"{days} days")
+    parts.append(f"{hours:02}:{minutes:02}:{sec:02}")
+    return ' '.join(parts)
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, (datetime, date)):
+        if isinstance(obj, (datetime, date, time)):
             return obj.isoformat()
         if isinstance(obj, timedelta):
-            days = obj.days
-            seconds = obj.seconds
-            hours, remainder = divmod(seconds, 3600)
-            minutes, sec = divmod(remainder, 60)
-            parts = []
-            if days != 0:
-                parts.append(f"{days} days")
-            parts.append(f"{hours:02}:{minutes:02}:{sec:02}")
-            return ' '.join(parts)
+            return format_timedelta(obj)
         if isinstance(obj, Decimal):
             return float(obj)  # <-- conversion Decimal → float
         return super().default(obj)
 
+
+def _orjson_default(obj):
+    # orjson sérialise nativement datetime/date/uuid ; seuls restent les types au format maison
+    if isinstance(obj, timedelta):
+        return format_timedelta(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj):
+    """Copie de obj où NaN et ±Infinity (float ou Decimal) deviennent None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, Decimal):
+        return obj if obj.is_finite() else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _encode_std(obj, pretty):
+    if pretty:
+        return json.dumps(obj, cls=CustomJSONEncoder, ensure_ascii=False, indent=2, allow_nan=False)
+    return json.dumps(obj, cls=CustomJSONEncoder, allow_nan=False)
+
+
+def _dumps_std(obj, pretty=False):
+    try:
+        return _encode_std(obj, pretty).encode("utf-8")
+    except ValueError:
+        # NaN / Infinity n'existent pas en JSON : écrits null, comme le fait orjson
+        return _encode_std(_finite(obj), pretty).encode("utf-8")
+
+
+def _dumps_orjson(obj, pretty=False):
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    try:
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+    except TypeError:
+        # Cas non gérés par orjson (entiers > 64 bits...) : encodeur standard
+        return _dumps_std(obj, pretty)
+
+
+# 🔹 Sérialiseur actif, choisi au démarrage (JSON_BACKEND=orjson|json)
+if config.JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning("⚠️ JSON_BACKEND=orjson but orjson is not installed, falling back to json")
+_dumps = _dumps_orjson if config.JSON_BACKEND == "orjson" and orjson is not None else _dumps_std
+
+
+def dumps(obj, pretty=False):
+    """Sérialise obj en JSON (bytes UTF-8) avec le backend configuré."""
+    return _dumps(obj, pretty)
+
+
+def json_response(payload, status=200, pretty=False):
+    """
+    Réponse Flask JSON : helper commun aux routes RPC, backup et Drive.
+    jsonify() (login, verify, query) garde le fournisseur JSON par défaut de Flask.
+    """
+    return Response(response=dumps(payload, pretty), status=status, mimetype="application/json")
+
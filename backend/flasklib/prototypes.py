@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from flask import request
+from flask_cors import cross_origin
+import jwt
+from .db import get_conn, parse_arguments
+from .types import compile_call
+from .json_encoder import json_response
+import flasklib.config as config
+from .config import JWT_SECRET, get_jwt_audience
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Cache des prototypes par base :
+#   database_id -> {"functions": {nom: proto}, "schema_version": str, "loaded_at": float, "checked_at": float}
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _fetch_schema_version(cur):
+    cur.execute("SELECT schema_version FROM inventory.app_config ORDER BY id LIMIT 1;")
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _load(cur, database_id, schema):
+    """Charge en une seule requête catalogue les prototypes de toutes les fonctions du schéma."""
+    cur.execute("""
+        SELECT p.proname, n.nspname, pg_get_function_identity_arguments(p.oid), t.typname, p.provolatile
+        FROM pg_proc p
+        JOIN pg_namespace n ON n.oid = p.pronamespace
+        JOIN pg_type t ON t.oid = p.prorettype
+        WHERE n.nspname = %s
+        ORDER BY p.oid;
+    """, (schema,))
+
+    # En cas de surcharge, la fonction la plus récente (oid le plus grand) l'emporte.
+    # Le plan d'appel (requête + convertisseurs) est compilé ici, une fois par chargement.
+    functions = {}
+    for func_name, schema_name, arguments_str, return_type, volatility in cur.fetchall():
+        arguments = parse_arguments(arguments_str)
+        functions[func_name] = {
+            "function_name": func_name,
+            "schema_name": schema_name,
+            "arguments": arguments,
+            "return_type": return_type,
+            "volatility": volatility,  # 'i' IMMUTABLE, 's' STABLE, 'v' VOLATILE
+            "plan": compile_call(schema_name, func_name, arguments)
+        }
+
+    now = time.monotonic()
+    entry = {
+        "functions": functions,
+        "schema_version": _fetch_schema_version(cur),
+        "loaded_at": now,
+        "checked_at": now
+    }
+    _cache[database_id] = entry
+    logger.info("🧩 %d prototypes loaded for %s (schema_version=%s)",
+                len(functions), database_id, entry["schema_version"])
+    return entry
+
+
+def get_prototype(cur, database_id, function_name, schema="inventory"):
+    """
+    Renvoie le prototype de schema.function_name depuis le cache de la base.
+    Le cache est rechargé si app_config.schema_version a changé (vérifié au plus
+    toutes les PROTOTYPE_CACHE_TTL secondes) ou si la fonction est inconnue.
+    """
+    entry = _cache.get(database_id)
+    now = time.monotonic()
+
+    if entry is None or now - entry["checked_at"] > config.PROTOTYPE_CACHE_TTL:
+        with _cache_lock:
+            entry = _cache.get(database_id)
+            if entry is None:
+                entry = _load(cur, database_id, schema)
+            elif now - entry["checked_at"] > config.PROTOTYPE_CACHE_TTL:
+                version = _fetch_schema_version(cur)
+                if version != entry["schema_version"]:
+                    logger.info("🔄 schema_version changed for %s (%s → %s), reloading prototypes",
+                                database_id, entry["schema_version"], version)
+                    entry = _load(cur, database_id, schema)
+                else:
+                    entry["checked_at"] = now
+
+    proto = entry["functions"].get(function_name)
+    if proto is None and now - entry["loaded_at"] > config.PROTOTYPE_CACHE_TTL:
+        # Fonction peut-être déployée depuis le dernier chargement
+        with _cache_lock:
+            entry = _load(cur, database_id, schema)
+        proto = entry["functions"].get(function_name)
+    return proto
+
+
+def preload(cur, database_id, schema="inventory"):
+    """Charge le cache de la base s'il est encore vide (préchauffage au démarrage)."""
+    if database_id in _cache:
+        return
+    with _cache_lock:
+        if database_id not in _cache:
+            _load(cur, database_id, schema)
+
+
+def peek_prototype(database_id, function_name):
+    """Prototype déjà en cache, sans accès à la base (None si inconnu ou cache à revérifier)."""
+    entry = _cache.get(database_id)
+    if entry is None or time.monotonic() - entry["checked_at"] > config.PROTOTYPE_CACHE_TTL:
+        return None
+    return entry["functions"].get(function_name)
+
+
+def invalidate(database_id=None):
+    """Vide le cache d'une base (ou de toutes les bases)."""
+    with _cache_lock:
+        if database_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(database_id, None)
+
+
+def register_routes(app):
+    @app.route("/reload-prototypes/<database_id>", methods=["POST"])
+    @cross_origin(origins=config.ALLOWED_ORIGINS, supports_credentials=True)
+    def reload_prototypes(database_id):
+        database_id = database_id.upper()
+        try:
+            # 🔹 JWT authentication
+            auth_header = request.headers.get("Authorization", "")
+            token = auth_header.split(" ")[1] if " " in auth_header else None
+            if not token:
+                return json_response({"error": "No token provided"}, 401)
+
+            decoded = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], audience=get_jwt_audience(database_id))
+            role = decoded.get("app_metadata", {}).get("role")
+            if role not in ["admin", "dev"]:
+                return json_response({"error": "Forbidden"}, 403)
+
+            # 🔹 Rechargement immédiat du cache
+            with get_conn(database_id) as conn:
+                with conn.cursor() as cur:
+                    with _cache_lock:
+                        entry = _load(cur, database_id, "inventory")
+
+            return json_response({
+                "status": "success",
+                "functions": len(entry["functions"]),
+                "schema_version": entry["schema_version"]
+            })
+
+        except jwt.ExpiredSignatureError:
+            return json_response({"error": "Token expired"}, 401)
+        except jwt.InvalidTokenError as e:
+            return json_response({"error": f"Invalid token: {e}"}, 401)
+        except Exception as e:
+            logger.exception("❌ Prototype reload failed for database %s", database_id)
+            return json_response(
+                {"status": "error", "error": f"Unexpected error: {str(e)}"},
+                status=500
+            )
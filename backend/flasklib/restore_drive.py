@@ -1,6 +1,5 @@
 import os
 import re
-import json
 import subprocess
 import logging
 import psycopg
@@ -8,11 +7,14 @@ import tempfile
 from psycopg.rows import dict_row
 from psycopg import sql
 from io import StringIO
-from flask import request, Response
+from flask import request
 from flask_cors import cross_origin
 import jwt
 from googleapiclient.http import MediaIoBaseDownload
-from .db import get_db_config
+from .db import get_conn
+from . import rpc_cache
+from .admission import admit
+from .json_encoder import json_response
 from .utils import get_drive_folder_id, get_drive_service, DriveFolderType
 from .config import logger, TABLES, SEQUENCES, ALLOWED_ORIGINS, JWT_SECRET, get_jwt_audience
 
@@ -266,6 +268,17 @@ def realign_sequences(cur):
         except Exception as e:
             logger.warning(f"⚠ Impossible de réaligner la séquence pour {table}: {e}")
 
+def refresh_denormalized(cur):
+    """
+    Recalcule les caches tenus à jour par triggers (inventory.reservable_tags),
+    si la base les possède.
+    """
+    cur.execute("SELECT to_regproc('inventory.refresh_reservable_tags') IS NOT NULL;")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT inventory.refresh_reservable_tags(ARRAY(SELECT id FROM inventory.reservable));")
+        logger.info("✅ Cache styles/couleurs recalculé")
+
+
 def get_backup_version(dump_path):
     """Extrait schema_version depuis le dump, si présent, de manière dynamique."""
     backup_version = None
@@ -321,17 +334,17 @@ def get_current_version(conn):
 def register_routes(app):
     @app.route("/restore/<database_id>", methods=["POST"])
     @cross_origin(origins=["*"], supports_credentials=True)
+    @admit("heavy")
     def restore_database(database_id):
         import tempfile
         import subprocess
 
         local_file = f"/tmp/{database_id}_restore.sql"
-        conn = None
         try:
             auth_header = request.headers.get("Authorization", "")
             token = auth_header.split(" ")[1] if " " in auth_header else None
             if not token:
-                return Response(json.dumps({"error": "No token provided"}), status=401, mimetype="application/json")
+                return json_response({"error": "No token provided"}, 401)
             decoded = jwt.decode(   token,
                                     JWT_SECRET,
                                     algorithms=["HS256"],
@@ -339,19 +352,19 @@ def register_routes(app):
                                 )
             user_role = decoded.get("app_metadata", {}).get("role")
             if user_role not in ["admin", "dev"]:
-                return Response(json.dumps({"error": "Forbidden"}), status=403, mimetype="application/json")
+                return json_response({"error": "Forbidden"}, 403)
 
             params = request.get_json() or {}
             file_id = params.get("drive_file_id")
             strict_mode = params.get("strict", False)
             if not file_id:
-                return Response(json.dumps({"error": "drive_file_id required"}), status=400, mimetype="application/json")
+                return json_response({"error": "drive_file_id required"}, 400)
 
             drive_service = get_drive_service(database_id, DriveFolderType.BACKUP)
             folder_id = get_drive_folder_id(database_id, DriveFolderType.BACKUP)
             file_metadata = drive_service.files().get(fileId=file_id, fields="id, name, parents").execute()
             if folder_id not in file_metadata.get("parents", []):
-                return Response(json.dumps({"error": "File not in correct backup folder"}), status=400, mimetype="application/json")
+                return json_response({"error": "File not in correct backup folder"}, 400)
 
             request_drive = drive_service.files().get_media(fileId=file_id)
             with open(local_file, "wb") as f:
@@ -360,76 +373,73 @@ def register_routes(app):
                 while not done:
                     _, done = downloader.next_chunk()
 
-            cfg = get_db_config(database_id)
-            conn = psycopg.connect(
-                host=cfg["host"], port=cfg["port"], user=cfg["user"],
-                password=cfg["password"], dbname=cfg["dbname"]
-            )
-            conn.autocommit = False
-            
-            # 🔹 Point de restore global
-            with conn.cursor() as cur:
-                cur.execute("SAVEPOINT pre_restore;")
-
-            backup_version = get_backup_version(local_file)
-            current_schema_version = get_current_version(conn)
-
-            logger.info(f"🔹 Backup schema_version: {backup_version}")
-            logger.info(f"🔹 Current schema_version: {current_schema_version}")
-            logger.info(f"🔹 strict_mode flag: {strict_mode}")
-
-            mode_str = None
-
-            with conn.cursor() as cur:
-                # 1️⃣ Truncate toutes les tables
-                truncate_tables(cur)
-
-                # 2️⃣ Restore en fonction du mode
-                if strict_mode:
-                    if backup_version is None:
-                        logger.error("🔹 Impossible de déterminer backup_version, mode strict échoue")
-                        raise Exception("backup_version introuvable, restore strict impossible")
-                    elif backup_version != current_schema_version:
-                        logger.error(f"🔹 Version du backup différente de la version courante, rollback obligatoire "
-                                     f"(backup {backup_version} vs current {current_schema_version})")
-                        raise Exception(f"Version mismatch: backup {backup_version} vs current {current_schema_version}")
-                    else:
-                        logger.info("🔹 Mode strict activé, versions identiques, restauration en cours")
-                        restore_strict(local_file, cur)
-                        mode_str = "strict"
-                else:
-                    if backup_version is None:
-                        logger.warning("🔹 backup_version introuvable, bascule automatique en mode tolérant")
+            # 🔹 Connexion empruntée au pool (rollback global automatique en cas d'erreur)
+            with get_conn(database_id) as conn:
+                conn.autocommit = False
+
+                # 🔹 Point de restore global
+                with conn.cursor() as cur:
+                    cur.execute("SAVEPOINT pre_restore;")
+
+                backup_version = get_backup_version(local_file)
+                current_schema_version = get_current_version(conn)
+
+                logger.info(f"🔹 Backup schema_version: {backup_version}")
+                logger.info(f"🔹 Current schema_version: {current_schema_version}")
+                logger.info(f"🔹 strict_mode flag: {strict_mode}")
+
+                mode_str = None
+
+                with conn.cursor() as cur:
+                    # 1️⃣ Truncate toutes les tables
+                    truncate_tables(cur)
+
+                    # 2️⃣ Restore en fonction du mode
+                    if strict_mode:
+                        if backup_version is None:
+                            logger.error("🔹 Impossible de déterminer backup_version, mode strict échoue")
+                            raise Exception("backup_version introuvable, restore strict impossible")
+                        elif backup_version != current_schema_version:
+                            logger.error(f"🔹 Version du backup différente de la version courante, rollback obligatoire "
+                                         f"(backup {backup_version} vs current {current_schema_version})")
+                            raise Exception(f"Version mismatch: backup {backup_version} vs current {current_schema_version}")
+                        else:
+                            logger.info("🔹 Mode strict activé, versions identiques, restauration en cours")
+                            restore_strict(local_file, cur)
+                            mode_str = "strict"
                     else:
-                        logger.info("🔹 Mode tolérant activé")
-                    restore_tolerant(local_file, cur)
-                    mode_str = "tolerant"
+                        if backup_version is None:
+                            logger.warning("🔹 backup_version introuvable, bascule automatique en mode tolérant")
+                        else:
+                            logger.info("🔹 Mode tolérant activé")
+                        restore_tolerant(local_file, cur)
+                        mode_str = "tolerant"
+
+                    # 3️⃣ Réaligner toutes les séquences après restauration
+                    realign_sequences(cur)
 
-                # 3️⃣ Réaligner toutes les séquences après restauration
-                realign_sequences(cur)
+                    # 🔹 Triggers désactivés pendant le restore : recalcul des données dénormalisées
+                    refresh_denormalized(cur)
 
-                # 4️⃣ Remettre app_config aux versions pré-restore
-                cur.execute("""
-                    UPDATE inventory.app_config
-                    SET schema_version = %s
-                """, (current_schema_version,))
+                    # 4️⃣ Remettre app_config aux versions pré-restore
+                    cur.execute("""
+                        UPDATE inventory.app_config
+                        SET schema_version = %s
+                    """, (current_schema_version,))
 
 
-            logger.info(f"🔹 Restore terminé en mode: {mode_str}")
+                logger.info(f"🔹 Restore terminé en mode: {mode_str}")
 
 
-            conn.commit()
-            return Response(json.dumps({
+                conn.commit()
+            # Données remplacées en bloc : les réponses RPC en cache sont périmées
+            rpc_cache.invalidate(database_id.upper(), forget_watermark=True)
+            return json_response({
                 "status": "success",
                 "mode": mode_str,
                 "schema": {"current": current_schema_version, "backup": backup_version}
-            }), mimetype="application/json")
+            })
 
         except Exception as e:
-            if conn:
-                conn.rollback()  # 🔹 rollback global
             logger.exception("Restore execution failed")
-            return Response(json.dumps({"error": str(e)}), status=500, mimetype="application/json")
-        finally:
-            if conn:
-                conn.close()
+            return json_response({"error": str(e)}, 500)
@@ -2,7 +2,8 @@
 import logging
 from flask import request, jsonify
 from flask_cors import cross_origin
-from .db import get_conn
+from .db import get_conn, pool_stats, breaker_state
+from . import warmup, admission
 from .auth import login as auth_login, verify as auth_verify, signup as auth_signup
 import flasklib.config as config
 
@@ -30,31 +31,35 @@ def register_routes(app):
         sql = request.json.get("sql") if request.json else None
         if not sql:
             return jsonify({"error": "No SQL provided"}), 400
-        conn = cur = None
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute(sql)
-            if cur.description:
-                columns = [desc[0] for desc in cur.description]
-                rows = [dict(zip(columns, row)) for row in cur.fetchall()]
-                result = {"rows": rows}
-            else:
-                conn.commit()
-                result = {"rows_affected": cur.rowcount}
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    if cur.description:
+                        columns = [desc[0] for desc in cur.description]
+                        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+                        result = {"rows": rows}
+                    else:
+                        conn.commit()
+                        result = {"rows_affected": cur.rowcount}
             return jsonify(result)
         except Exception as e:
             logger.exception("Query failed")
             return jsonify({"error": str(e)}), 500
-        finally:
-            if cur:
-                cur.close()
-            if conn:
-                conn.close()
 
     @app.route("/health")
     def health():
-        return jsonify({"status": "ok"}), 200
+        # État de chaque base sans requête SQL : warm/cold, pools ouverts, files d'admission
+        databases = {
+            db["baseid"]: {
+                **warmup.status(db["baseid"]),
+                "breaker": breaker_state(db["baseid"]),
+                "pools": pool_stats(db["baseid"]),
+                "admission": admission.snapshot(db["baseid"]),
+            }
+            for db in config.DATABASES
+        }
+        return jsonify({"status": "ok", "databases": databases}), 200
 
     @app.route("/cors-test", methods=["GET"])
     def cors_test():
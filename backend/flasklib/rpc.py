@@ -1,224 +1,679 @@
 import os
 import json
-from psycopg.types.json import Json
 import logging
 import pprint
+from contextlib import ExitStack
 from flask import request, jsonify, Response
 from flask_cors import cross_origin
 import jwt
-from .db import get_conn, log_notices, get_function_prototype
-from .types import get_sql_value
-from .json_encoder import CustomJSONEncoder
+from .db import get_conn, log_notices, note_write, fixed_role, DatabaseUnavailable
+from .prototypes import get_prototype, peek_prototype
+from . import rpc_cache, single_flight
+from .admission import admit
+from .deadline import Watchdog, STATEMENT_TIMEOUT_SQL, budget, statement_timeout
+from .types import bind_arguments
+from .json_encoder import dumps, json_response
 import psycopg
 import flasklib.config as config
-from .config import DBUSER, JWT_SECRET, get_jwt_audience
+from .config import JWT_SECRET, get_jwt_audience
 
 
 logger = logging.getLogger(__name__)
 
+# 🔹 Préambule RLS en une seule requête : équivalent de SET LOCAL ROLE,
+#    SET LOCAL request.jwt.claims et SET LOCAL client_min_messages
+RLS_PREAMBLE_SQL = (
+    "SELECT set_config('role', %s, true), "
+    "set_config('request.jwt.claims', %s, true), "
+    "set_config('client_min_messages', 'notice', true);"
+)
+
+# 🔹 Même préambule sur une connexion d'un pool par rôle : le rôle y est déjà fixé
+RLS_CLAIMS_SQL = (
+    "SELECT set_config('request.jwt.claims', %s, true), "
+    "set_config('client_min_messages', 'notice', true);"
+)
+
+def rollback_rpc(cur):
+    """
+    Annule un appel RPC : retour au SAVEPOINT puis ROLLBACK de la transaction.
+    Le SAVEPOINT n'existe pas si l'échec vient du préambule (rôle inconnu).
+    """
+    try:
+        cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
+    except psycopg.errors.InvalidSavepointSpecification:
+        pass
+    cur.execute("ROLLBACK;")
+
+
+def is_missing_role_error(e, rls_role):
+    """Vrai si l'erreur vient du préambule RLS (rôle JWT absent de la base)."""
+    return isinstance(e, psycopg.errors.InvalidParameterValue) and f'role "{rls_role}"' in str(e)
+
+
+def decode_token(database_id):
+    """
+    Décode le JWT de la requête.
+    Renvoie (claims, None) ou (None, réponse d'erreur 401).
+    """
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.split(" ")[1] if " " in auth_header else None
+    logger.debug("🔹 Authorization header: %s", auth_header)
+    if not token:
+        raise ValueError("No token provided")
+
+    try:
+        decoded = jwt.decode(
+            token,
+            JWT_SECRET,
+            algorithms=["HS256"],
+            audience=get_jwt_audience(database_id)
+        )
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"data": None, "error": "Token expired"}), 401)
+    except jwt.InvalidAudienceError:
+        return None, (jsonify({"data": None, "error": "Invalid audience in token"}), 401)
+    except jwt.InvalidSignatureError:
+        return None, (jsonify({"data": None, "error": "Invalid token signature"}), 401)
+    except jwt.DecodeError:
+        return None, (jsonify({"data": None, "error": "Malformed token"}), 401)
+    except Exception as e:
+        return None, (jsonify({"data": None, "error": f"Token verification failed: {str(e)}"}), 401)
+
+    logger.debug("🔑 JWT decoded claims: %s", decoded)
+    return decoded, None
+
+
+def build_call(proto, params, pg_json=False):
+    """
+    Requête et arguments convertis de l'appel, d'après le plan compilé du prototype.
+    pg_json=True : la requête renvoie le résultat déjà sérialisé en JSON par PostgreSQL.
+    """
+    plan = proto["plan"]
+    sql = plan["json_sql"] if pg_json else plan["sql"]
+    logger.debug("🔹 Final SQL: %s", sql)
+    return sql, bind_arguments(plan, params)
+
+
+def fetch_result(cur, columnar=False):
+    """
+    Lignes du curseur sous forme de liste de dicts (None si pas de résultat).
+    columnar=True : {"columns": [...], "rows": [[...], ...]}, sans répéter les noms de colonnes.
+    """
+    if not cur.description:
+        return None
+    rows = cur.fetchall()
+    columns = [desc[0] for desc in cur.description]
+    if columnar:
+        return {"columns": columns, "rows": rows}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def map_rpc_error(e, sql, proto, sql_args):
+    """
+    Traduit une erreur d'exécution PostgreSQL en (statut HTTP, erreur renvoyée au client).
+    """
+    if isinstance(e, (psycopg.errors.UniqueViolation, psycopg.errors.RaiseException)):
+        logger.warning("⚠️ Exception levée depuis PostgreSQL: %s", e)
+        error_msg = str(e)
+        if "Le couple prénom/nom" in error_msg:
+            user_friendly_msg = error_msg.split("Le couple prénom/nom")[-1].strip()
+            user_friendly_msg = f"Le participant {user_friendly_msg}"
+        else:
+            user_friendly_msg = error_msg
+        return 400, user_friendly_msg
+
+    if isinstance(e, psycopg.errors.ForeignKeyViolation):
+        logger.warning("🔒 Foreign key violation: %s", e)
+        return 400, f"Foreign key violation: {str(e)}"
+
+    if isinstance(e, psycopg.errors.InsufficientPrivilege):
+        logger.warning("🔒 RLS violation / insufficient privilege: %s", e)
+        return 403, "Violation RLS: opération refusée"
+
+    if isinstance(e, psycopg.errors.QueryCanceled):
+        logger.warning("⏱️ RPC cancelled (time budget exceeded): %s", e)
+        return 504, "Temps d'exécution dépassé : requête annulée"
+
+    logger.exception("❌ RPC execution failed")
+    error_detail = {
+        "message": str(e),
+        "type": type(e).__name__,
+        "sql": sql,
+        "args": [
+            {"name": arg["name"], "type": arg["type"],
+             "value": repr(value)}
+            for arg, value in zip(proto.get("arguments", []), sql_args)
+        ]
+    }
+    return 500, error_detail
+
+
+def pg_json_mode():
+    """
+    Vrai si le client demande ?pgjson=1 : le tableau JSON est construit par PostgreSQL
+    (json_agg) et renvoyé tel quel, sans décodage ni réencodage en Python.
+    Les dates, intervalles et numériques suivent alors le format JSON de PostgreSQL.
+    """
+    return request.args.get("pgjson", "").lower() in ("1", "true")
+
+
+def columnar_mode():
+    """Vrai si le client demande le format colonnes/lignes (?format=columns)."""
+    return request.args.get("format", "").lower() == "columns"
+
+
+def stream_mode():
+    """
+    Mode de streaming demandé par le client : "json", "ndjson" ou None.
+    Choisi par ?stream=1|json|ndjson ou par l'en-tête Accept: application/x-ndjson.
+    """
+    flag = request.args.get("stream", "").lower()
+    if flag == "ndjson":
+        return "ndjson"
+    if flag in ("1", "true", "json"):
+        return "json"
+    if "application/x-ndjson" in request.headers.get("Accept", ""):
+        return "ndjson"
+    return None
+
+
+def rls_preamble(conn, rls_role, claims_json):
+    """Requête et arguments du préambule RLS adaptés à la connexion (rôle fixé ou non)."""
+    if fixed_role(conn) == rls_role:
+        return RLS_CLAIMS_SQL, (claims_json,)
+    return RLS_PREAMBLE_SQL, (rls_role, claims_json)
+
+
+def resolve_prototype(database_id, function_name):
+    """
+    Prototype de la fonction : depuis le cache, sinon chargé sur une connexion du pool
+    partagé (rôle de connexion), avant d'emprunter la connexion qui exécutera l'appel.
+    """
+    proto = peek_prototype(database_id, function_name)
+    if proto is None:
+        with get_conn(database_id) as conn:
+            with conn.cursor() as cur:
+                proto = get_prototype(cur, database_id, function_name, "inventory")
+    if not proto:
+        raise ValueError(f"Function {function_name} not found in {database_id}")
+    return proto
+
+
+def after_write(database_id):
+    """Après un appel VOLATILE : réponses en cache périmées, lectures suivantes sur le primaire."""
+    rpc_cache.invalidate(database_id)
+    note_write(database_id)
+
+
+def call_rpc(database_id, function_name, decoded, params, pg_json=False, columnar=False):
+    """
+    Exécute un appel RPC sur une connexion du pool, en un seul aller-retour.
+
+    Renvoie (status, corps JSON en bytes, filigrane du cache ou None, fonction STABLE ?) :
+    un résultat indépendant de la requête HTTP, partageable entre appels identiques.
+
+    Les fonctions STABLE / IMMUTABLE s'exécutent en transaction READ ONLY, sur le réplica
+    "read_host" de la base s'il est configuré ; la connexion vient du sous-pool du rôle RLS
+    si les pools par rôle sont activés.
+    """
+    # --- Prototype fonction (cache par base) ---
+    proto = resolve_prototype(database_id.upper(), function_name)
+    logger.debug("🧩 Contenu de proto pour %s :\n%s", function_name, pprint.pformat(proto))
+    stable = rpc_cache.is_stable(proto)
+
+    # --- Rôle et claims pour RLS (appliqués dans la transaction, cf. RLS_PREAMBLE_SQL) ---
+    rls_role = decoded.get("role")
+    if not rls_role:
+        raise ValueError("JWT missing required 'role' claim for RLS")
+    claims_json = json.dumps(decoded)
+
+    sql, sql_args = build_call(proto, params, pg_json)
+    seconds = budget(database_id.upper(), function_name)
+
+    with get_conn(database_id.upper(), read=stable, role=rls_role) as conn:
+        cur = conn.cursor()
+        conn.autocommit = False
+
+        # --- Exécution sécurisée avec SAVEPOINT, en pipeline ---
+        # BEGIN, rôle + claims, budget, SAVEPOINT, appel, RELEASE et COMMIT partent
+        # ensemble : un seul aller-retour réseau vers PostgreSQL.
+        # Le filigrane du cache est lu en tête de transaction (avant le changement de rôle)
+        result = None
+        watermark = None
+        wm_cur = conn.cursor()
+        try:
+            with Watchdog(conn, seconds), conn.pipeline():
+                if stable:
+                    conn.execute("SET TRANSACTION READ ONLY;")
+                    wm_cur.execute(rpc_cache.watermark_sql(fixed_role(conn)))
+                conn.execute(*rls_preamble(conn, rls_role, claims_json))
+                conn.execute(STATEMENT_TIMEOUT_SQL, (statement_timeout(seconds),))
+                conn.execute("SAVEPOINT sp_rpc;")
+                cur.execute(sql, sql_args)
+                conn.execute("RELEASE SAVEPOINT sp_rpc;")
+                conn.execute("COMMIT;")
+            log_notices(conn)
+            result = cur.fetchone()[0] if pg_json else fetch_result(cur, columnar)
+            if stable:
+                row = wm_cur.fetchone()
+                watermark = row[0] if row else None
+
+        except Exception as e:
+            rollback_rpc(cur)
+            if is_missing_role_error(e, rls_role):
+                raise ValueError(f"RLS role '{rls_role}' not found in database: {str(e)}")
+            status, error = map_rpc_error(e, sql, proto, sql_args)
+            return status, dumps({"data": None, "error": error}), None, stable
+
+        finally:
+            # Rôle et claims sont locaux à la transaction : rien à réinitialiser
+            cur.close()
+            wm_cur.close()
+
+    if pg_json:
+        # Texte JSON produit par PostgreSQL, inséré tel quel dans l'enveloppe
+        return 200, f'{{"data": {result}, "error": null}}'.encode("utf-8"), watermark, stable
+
+    logger.debug("🔹 RPC result: %s", result)
+    return 200, dumps({"data": result, "error": None}), watermark, stable
+
+
+def batch_preamble(conn, rls_role, claims_json, read_only):
+    """Met en file le début de transaction d'un lot : READ ONLY éventuel puis préambule RLS."""
+    steps = []
+    if read_only:
+        steps.append((None, conn.execute("SET TRANSACTION READ ONLY;")))
+    steps.append((None, conn.execute(*rls_preamble(conn, rls_role, claims_json))))
+    return steps
+
+
+def queue_call(conn, steps, index, sql, sql_args, seconds):
+    """Met en file le budget puis l'appel index du lot ; renvoie le curseur de l'appel."""
+    steps.append((index, conn.execute(STATEMENT_TIMEOUT_SQL, (statement_timeout(seconds),))))
+    call_cur = conn.cursor()
+    call_cur.execute(sql, sql_args)
+    steps.append((index, call_cur))
+    return call_cur
+
+
+def failed_call(steps):
+    """
+    Index de l'appel en échec d'après les étapes du pipeline : la première étape sans
+    résultat est celle qui a échoué. None si c'est une requête du lot (préambule, COMMIT).
+    """
+    return next((index for index, c in steps if c.pgresult is None), None)
+
+
+def close_steps(steps):
+    """Ferme les curseurs des étapes du pipeline."""
+    for _, c in steps:
+        c.close()
+
+
+def batch_error_response(e, count):
+    """Échec du lot lui-même (préambule, COMMIT) : aucun appel n'est en cause."""
+    status, error = map_rpc_error(e, None, {}, ())
+    results = [{"data": None, "error": "Lot annulé (échec du préambule ou du COMMIT)", "status": 424}] * count
+    return json_response({"data": results, "error": error}, status)
+
+
+def unavailable_response(e):
+    """Base injoignable : échec court et explicite, le client peut réessayer après Retry-After."""
+    response = json_response({"data": None, "error": str(e)}, 503)
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def with_etag(response, tag):
+    """ETag d'une lecture STABLE ; le client revalide à chaque appel (If-None-Match)."""
+    response.set_etag(tag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def stream_rpc(database_id, function_name, decoded, mode):
+    """
+    🔹 Exécute la fonction via un curseur côté serveur et renvoie ses lignes par paquets
+    de RPC_STREAM_CHUNK_ROWS, sans jamais matérialiser tout le résultat en mémoire.
+
+    - mode "json"   : même enveloppe que /rpc ({"data": [...], "error": null}), écrite au fil de l'eau
+    - mode "ndjson" : une ligne JSON par ligne de résultat
+
+    Le premier paquet est lu avant l'envoi de la réponse : une erreur PostgreSQL
+    (RAISE, RLS...) renvoie donc toujours le statut HTTP habituel.
+    """
+    proto = resolve_prototype(database_id.upper(), function_name)
+    params = request.get_json() or {}
+    rls_role = decoded.get("role")
+    if not rls_role:
+        raise ValueError("JWT missing required 'role' claim for RLS")
+    sql, sql_args = build_call(proto, params)
+    seconds = budget(database_id.upper(), function_name)
+
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(get_conn(database_id.upper(), read=rpc_cache.is_stable(proto), role=rls_role))
+        cur = stack.enter_context(conn.cursor())
+
+        # Les curseurs nommés (DECLARE) ne fonctionnent qu'en transaction et hors pipeline
+        conn.autocommit = False
+        server_cur = stack.enter_context(conn.cursor(name=f"rpc_{function_name}"))
+        try:
+            # Le budget s'applique à chaque FETCH du curseur serveur
+            with conn.pipeline():
+                if rpc_cache.is_stable(proto):
+                    cur.execute("SET TRANSACTION READ ONLY;")
+                cur.execute(*rls_preamble(conn, rls_role, json.dumps(decoded)))
+                cur.execute(STATEMENT_TIMEOUT_SQL, (statement_timeout(seconds),))
+            with Watchdog(conn, seconds):
+                server_cur.execute(sql, sql_args)
+                first_rows = server_cur.fetchmany(config.RPC_STREAM_CHUNK_ROWS)
+        except Exception as e:
+            conn.rollback()
+            if is_missing_role_error(e, rls_role):
+                raise ValueError(f"RLS role '{rls_role}' not found in database: {str(e)}")
+            status, error = map_rpc_error(e, sql, proto, sql_args)
+            stack.close()
+            return json_response({"data": None, "error": error}, status)
+        log_notices(conn)
+
+    except Exception:
+        stack.close()
+        raise
+
+    columns = [desc[0] for desc in server_cur.description]
+
+    def encode(rows):
+        return [dumps(dict(zip(columns, row))) for row in rows]
+
+    completed = False   # COMMIT fait après l'envoi de la dernière ligne
+    closed = False
+
+    def finish():
+        """
+        Rend la connexion. Une réponse qui n'est pas allée jusqu'au bout (erreur, client
+        parti : GeneratorExit, générateur jamais démarré) est annulée : sans ROLLBACK,
+        la sortie normale du « with conn » de get_conn validerait la transaction.
+        """
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            if not completed:
+                conn.rollback()
+        except Exception as e:
+            logger.warning("⚠️ Stream rollback failed: %s", e)
+        finally:
+            stack.close()
+
+    def generate():
+        nonlocal completed
+        try:
+            rows = first_rows
+            sent = 0
+            if mode == "json":
+                yield b'{"data": ['
+            while rows:
+                lines = encode(rows)
+                if mode == "json":
+                    yield (b"," if sent else b"") + b",".join(lines)
+                else:
+                    yield b"\n".join(lines) + b"\n"
+                sent += len(rows)
+                rows = server_cur.fetchmany(config.RPC_STREAM_CHUNK_ROWS)
+            if mode == "json":
+                yield b'], "error": null}'
+            conn.commit()
+            completed = True
+            if not rpc_cache.is_stable(proto):
+                after_write(database_id.upper())
+            logger.debug("🔹 RPC %s streamed %d rows", function_name, sent)
+        except Exception:
+            # Statut déjà envoyé : la réponse tronquée signale l'erreur au client
+            logger.exception("❌ RPC %s stream interrupted", function_name)
+        finally:
+            finish()
+
+    mimetype = "application/json" if mode == "json" else "application/x-ndjson"
+    response = Response(generate(), mimetype=mimetype)
+    # Libère la connexion même si le client se déconnecte avant la première lecture
+    response.call_on_close(finish)
+    return response
+
 
 def register_routes(app):
-    @app.route("/rpc/<database_id>/<function_name>", methods=["POST"])
+    @app.route("/rpc/<database_id>/batch", methods=["POST"])
     @cross_origin(origins=config.ALLOWED_ORIGINS, supports_credentials=True)
-    def rpc(database_id, function_name):
-        logger.debug("➡️ RPC called for function: %s on database: %s", function_name, database_id)
+    @admit("rpc")
+    def rpc_batch(database_id):
+        """
+        🔹 Exécute une liste ordonnée d'appels sur une seule connexion, avec un seul préambule RLS.
+
+        Corps attendu :
+            {"calls": [{"function": "get_categories", "params": {}}, ...], "transaction": false}
+
+        - transaction=false : chaque appel est isolé par un SAVEPOINT, un échec n'annule que lui.
+        - transaction=true  : tout ou rien.
+        Dans les deux cas le lot part en un seul aller-retour (un de plus par appel en échec
+        en mode indépendant) ; un lot de fonctions STABLE s'exécute en READ ONLY, sur le réplica.
+        Un échec du préambule ou du COMMIT est une erreur du lot : aucun appel n'est mis en cause.
+
+        Les résultats sont renvoyés dans l'ordre des appels : {"data": [{"data", "error", "status"}, ...]}
+        """
+        logger.debug("➡️ RPC batch called on database: %s", database_id)
         try:
-            # 🔹 Récupération du token
-            auth_header = request.headers.get("Authorization", "")
-            token = auth_header.split(" ")[1] if " " in auth_header else None
-            logger.debug("🔹 Authorization header: %s", auth_header)
-            if not token:
-                raise ValueError("No token provided")
-
-            try:
-                decoded = jwt.decode(
-                    token,
-                    JWT_SECRET,
-                    algorithms=["HS256"],
-                    audience=get_jwt_audience(database_id)
-                )
-            except jwt.ExpiredSignatureError:
-                return jsonify({"data": None, "error": "Token expired"}), 401
-            except jwt.InvalidAudienceError:
-                return jsonify({"data": None, "error": "Invalid audience in token"}), 401
-            except jwt.InvalidSignatureError:
-                return jsonify({"data": None, "error": "Invalid token signature"}), 401
-            except jwt.DecodeError:
-                return jsonify({"data": None, "error": "Malformed token"}), 401
-            except Exception as e:
-                return jsonify({"data": None, "error": f"Token verification failed: {str(e)}"}), 401
-            
-            logger.debug("🔑 JWT decoded claims: %s", decoded)
-
-            # 🔹 Connexion sur la base demandée
-            conn = get_conn(database_id.upper())
-            conn.autocommit = False
-            cur = conn.cursor()
-            params = request.get_json() or {}
-            logger.debug("🔹 RPC params received: %s", params)
+            decoded, error_response = decode_token(database_id)
+            if error_response:
+                return error_response
 
-            # --- Transaction manuelle ---
-            cur.execute("BEGIN;")
+            body = request.get_json() or {}
+            calls = body.get("calls") if isinstance(body, dict) else body
+            atomic = bool(body.get("transaction", False)) if isinstance(body, dict) else False
+            if not isinstance(calls, list) or not calls:
+                return json_response({"data": None, "error": "'calls' must be a non-empty list"}, 400)
+            if len(calls) > config.RPC_BATCH_MAX_CALLS:
+                return json_response(
+                    {"data": None, "error": f"Too many calls in batch (max {config.RPC_BATCH_MAX_CALLS})"}, 400
+                )
 
-            # --- SET ROLE et claims pour RLS ---
             rls_role = decoded.get("role")
             if not rls_role:
                 raise ValueError("JWT missing required 'role' claim for RLS")
+            claims_json = json.dumps(decoded)
 
-            try:
-                cur.execute(f"SET ROLE \"{rls_role}\";")
-            except psycopg.errors.UndefinedObject as e:
-                raise ValueError(f"RLS role '{rls_role}' not found in database: {str(e)}")
+            # --- Préparation de chaque appel (prototype en cache + arguments) ---
+            prepared = []
+            results = []
+            for call in calls:
+                function_name = call.get("function") if isinstance(call, dict) else None
+                params = (call.get("params") or {}) if isinstance(call, dict) else {}
+                try:
+                    if not function_name:
+                        raise ValueError("Missing 'function' in batch call")
+                    proto = resolve_prototype(database_id.upper(), function_name)
+                    sql, sql_args = build_call(proto, params)
+                    prepared.append((proto, sql, sql_args, budget(database_id.upper(), function_name)))
+                    results.append(None)
+                except Exception as e:
+                    if atomic:
+                        raise
+                    prepared.append(None)
+                    results.append({"data": None, "error": str(e), "status": 500})
 
-            claims_json = json.dumps(decoded).replace("'", "''")
-            cur.execute(f"SET LOCAL request.jwt.claims = '{claims_json}';")
-            cur.execute("SET client_min_messages TO notice;")
-
-            # --- Prototype fonction ---
-            proto = get_function_prototype(cur, function_name, "inventory")
-            if not proto:
-                raise ValueError(f"Function {function_name} not found in {database_id}")
-            logger.debug("🧩 Contenu de proto pour %s :\n%s", function_name, pprint.pformat(proto))
-
-            sql_args = []
-            placeholders = []
-
-            PG_TYPE_MAP = {
-                "smallint": "integer",
-                "integer": "integer",
-                "text": "text",
-                "boolean": "boolean",
-                "json": "json",
-                "jsonb": "jsonb",
-                "timestamp with time zone": "timestamptz",
-                "timestamp without time zone": "timestamp",
-            }
-
-            for arg in proto["arguments"]:
-                val = get_sql_value(arg["name"], arg["type"], params)
-                pg_type = PG_TYPE_MAP.get(arg["type"], arg["type"])
-
-                # 🔹 envelopper Json/Jsonb
-                if pg_type in ("json", "jsonb") and val is not None and not isinstance(val, Json):
-                    val = Json(val, dumps=json.dumps)
-
-                # 🔹 conversion explicite des autres types
-                if pg_type == "integer" and val is not None:
-                    val = int(val)
-                elif pg_type == "text" and val is not None:
-                    val = str(val)
-                elif pg_type == "boolean" and val is not None:
-                    val = bool(val)
-                elif pg_type in ("timestamptz", "timestamp") and val is not None:
-                    val = val
-
-                sql_args.append(val)
-
-                # 🔹 cast explicite PostgreSQL
-                if val is None:
-                    placeholders.append("%s")
-                elif pg_type in ("json", "jsonb", "integer", "text", "boolean",
-                                 "timestamptz", "timestamp", "uuid"):
-                    placeholders.append(f"%s::{pg_type}")
-                else:
-                    placeholders.append("%s")
+            # Lot entièrement STABLE : transaction READ ONLY, sur le réplica s'il est configuré
+            read_only = all(rpc_cache.is_stable(call[0]) for call in prepared if call)
 
-            schema_name = proto.get("schema_name", "public")
-            sql = f"SELECT * FROM {schema_name}.{function_name}({', '.join(placeholders)});"
-            logger.debug("🔹 Final SQL: %s", sql)
+            with get_conn(database_id.upper(), read=read_only, role=rls_role) as conn:
+                cur = conn.cursor()
+                conn.autocommit = False
+                # Étapes du pipeline dans l'ordre d'envoi : (index de l'appel, curseur) ;
+                # index None pour les requêtes du lot lui-même (préambule, COMMIT)
+                steps = []
+                if atomic:
+                    # --- Tout ou rien : préambule, appels (chacun avec son budget) et COMMIT en pipeline ---
+                    budgets = [call[3] for call in prepared]
+                    try:
+                        with Watchdog(conn, 0 if 0 in budgets else sum(budgets)), conn.pipeline():
+                            steps += batch_preamble(conn, rls_role, claims_json, read_only)
+                            steps.append((None, conn.execute("SAVEPOINT sp_rpc;")))
+                            cursors = [queue_call(conn, steps, i, *call[1:]) for i, call in enumerate(prepared)]
+                            steps.append((None, conn.execute("RELEASE SAVEPOINT sp_rpc;")))
+                            steps.append((None, conn.execute("COMMIT;")))
+                        log_notices(conn)
+                        results = [{"data": fetch_result(c), "error": None, "status": 200} for c in cursors]
 
-            # --- Exécution sécurisée avec SAVEPOINT ---
-            cur.execute("SAVEPOINT sp_rpc;")
-            result = None
-            try:
-                cur.execute(sql, sql_args)
-                log_notices(conn)
+                    except Exception as e:
+                        rollback_rpc(cur)
+                        if is_missing_role_error(e, rls_role):
+                            raise ValueError(f"RLS role '{rls_role}' not found in database: {str(e)}")
+                        failed = failed_call(steps)
+                        if failed is None:
+                            return batch_error_response(e, len(prepared))
+                        proto, sql, sql_args, _ = prepared[failed]
+                        status, error = map_rpc_error(e, sql, proto, sql_args)
+                        results = [
+                            {"data": None, "error": error, "status": status} if i == failed else
+                            {"data": None, "error": f"Transaction annulée (échec de l'appel {failed})", "status": 424}
+                            for i in range(len(prepared))
+                        ]
+                        return json_response({"data": results, "error": error}, status)
+
+                    finally:
+                        close_steps(steps)
 
-                if cur.description:
-                    rows = cur.fetchall()
-                    columns = [desc[0] for desc in cur.description]
-                    result = [dict(zip(columns, row)) for row in rows]
-                else:
-                    result = None
-
-                cur.execute("RELEASE SAVEPOINT sp_rpc;")
-                cur.execute("COMMIT;")
-
-            except (psycopg.errors.UniqueViolation, psycopg.errors.RaiseException) as e:
-                cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
-                logger.warning("⚠️ Exception levée depuis PostgreSQL: %s", e)
-                cur.execute("ROLLBACK;")
-                error_msg = str(e)
-                if "Le couple prénom/nom" in error_msg:
-                    user_friendly_msg = error_msg.split("Le couple prénom/nom")[-1].strip()
-                    user_friendly_msg = f"Le participant {user_friendly_msg}"
                 else:
-                    user_friendly_msg = error_msg
-                return Response(
-                    response=json.dumps({"data": None, "error": user_friendly_msg}, cls=CustomJSONEncoder),
-                    status=400,
-                    mimetype="application/json"
-                )
+                    # --- Appels indépendants : un SAVEPOINT par appel, tous envoyés dans un pipeline ---
+                    # Un échec interrompt le pipeline : retour au SAVEPOINT de l'appel fautif,
+                    # puis les appels suivants repartent dans un nouveau pipeline.
+                    # Sans échec, préambule, appels et COMMIT font un seul aller-retour.
+                    pending = [i for i, call in enumerate(prepared) if call is not None]
+                    first = True
+                    while True:
+                        budgets = [prepared[i][3] for i in pending]
+                        steps = []
+                        cursors = {}
+                        try:
+                            with Watchdog(conn, 0 if 0 in budgets else sum(budgets)), conn.pipeline():
+                                if first:
+                                    steps += batch_preamble(conn, rls_role, claims_json, read_only)
+                                for i in pending:
+                                    steps.append((i, conn.execute("SAVEPOINT sp_rpc;")))
+                                    cursors[i] = queue_call(conn, steps, i, *prepared[i][1:])
+                                    steps.append((i, conn.execute("RELEASE SAVEPOINT sp_rpc;")))
+                                steps.append((None, conn.execute("COMMIT;")))
+                            log_notices(conn)
+                            for i, c in cursors.items():
+                                results[i] = {"data": fetch_result(c), "error": None, "status": 200}
+                            break
 
-            except psycopg.errors.ForeignKeyViolation as e:
-                cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
-                logger.warning("🔒 Foreign key violation: %s", e)
-                cur.execute("ROLLBACK;")
-                return Response(
-                    response=json.dumps({"data": None, "error": f"Foreign key violation: {str(e)}"}, cls=CustomJSONEncoder),
-                    status=400,
-                    mimetype="application/json"
-                )
+                        except Exception as e:
+                            failed = failed_call(steps)
+                            if failed is None:
+                                rollback_rpc(cur)
+                                if is_missing_role_error(e, rls_role):
+                                    raise ValueError(f"RLS role '{rls_role}' not found in database: {str(e)}")
+                                return batch_error_response(e, len(prepared))
+                            # Appels réussis avant l'échec : leurs résultats sont déjà lus
+                            for i in pending[:pending.index(failed)]:
+                                results[i] = {"data": fetch_result(cursors[i]), "error": None, "status": 200}
+                            cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
+                            cur.execute("RELEASE SAVEPOINT sp_rpc;")
+                            proto, sql, sql_args, _ = prepared[failed]
+                            status, error = map_rpc_error(e, sql, proto, sql_args)
+                            results[failed] = {"data": None, "error": error, "status": status}
+                            pending = pending[pending.index(failed) + 1:]
+                            first = False
 
-            except psycopg.errors.InsufficientPrivilege as e:
-                cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
-                logger.warning("🔒 RLS violation / insufficient privilege: %s", e)
-                cur.execute("ROLLBACK;")
-                return Response(
-                    response=json.dumps({"data": None, "error": "Violation RLS: opération refusée"}, cls=CustomJSONEncoder),
-                    status=403,
-                    mimetype="application/json"
-                )
+                        finally:
+                            close_steps(steps)
+
+                cur.close()
+
+            # Un appel VOLATILE a pu écrire : les réponses en cache de la base sont périmées
+            if any(call and not rpc_cache.is_stable(call[0]) for call in prepared):
+                after_write(database_id.upper())
+            return json_response({"data": results, "error": None})
+
+        except DatabaseUnavailable as e:
+            return unavailable_response(e)
+
+        except Exception as e:
+            logger.exception("❌ RPC batch failed on database %s", database_id)
+            return json_response({"data": None, "error": str(e)}, 500)
+
+    @app.route("/rpc/<database_id>/<function_name>", methods=["POST"])
+    @cross_origin(origins=config.ALLOWED_ORIGINS, supports_credentials=True, expose_headers=["ETag"])
+    @admit("rpc")
+    def rpc(database_id, function_name):
+        logger.debug("➡️ RPC called for function: %s on database: %s", function_name, database_id)
+        try:
+            # 🔹 Récupération et vérification du token
+            decoded, error_response = decode_token(database_id)
+            if error_response:
+                return error_response
 
-            except Exception as e:
-                cur.execute("ROLLBACK TO SAVEPOINT sp_rpc;")
-                logger.exception("❌ RPC execution failed")
-                cur.execute("ROLLBACK;")
-                error_detail = {
-                    "message": str(e),
-                    "type": type(e).__name__,
-                    "sql": sql,
-                    "args": [
-                        {"name": arg["name"], "type": arg["type"],
-                         "value": repr(get_sql_value(arg["name"], arg["type"], params))}
-                        for arg in proto.get("arguments", [])
-                    ]
-                }
-                return Response(
-                    response=json.dumps({"data": None, "error": error_detail}, cls=CustomJSONEncoder),
-                    status=500,
-                    mimetype="application/json"
+            # 🔹 Gros résultats : lecture par curseur serveur et envoi au fil de l'eau
+            mode = stream_mode()
+            if mode:
+                return stream_rpc(database_id, function_name, decoded, mode)
+
+            params = request.get_json() or {}
+            logger.debug("🔹 RPC params received: %s", params)
+            variant = request.query_string.decode()
+
+            # 🔹 Fonction STABLE, filigrane de la base connu :
+            #    - If-None-Match identique → 304 (au plus une lecture du filigrane) ;
+            #    - même appel, même rôle déjà en cache → réponse servie sans exécuter la fonction
+            cache_key = None
+            if rpc_cache.is_stable(peek_prototype(database_id.upper(), function_name)):
+                cache_key = rpc_cache.make_key(database_id.upper(), function_name, params, decoded, variant)
+                watermark = rpc_cache.fresh_watermark(database_id.upper())
+                if watermark is None and request.if_none_match:
+                    watermark = rpc_cache.read_watermark(database_id.upper())
+                if watermark is not None:
+                    tag = rpc_cache.etag(cache_key, watermark)
+                    if request.if_none_match.contains_weak(tag):
+                        logger.debug("⚡ RPC %s not modified", function_name)
+                        return with_etag(Response(status=304), tag)
+                    body = rpc_cache.get(cache_key, watermark)
+                    if body is not None:
+                        logger.debug("⚡ RPC %s served from cache", function_name)
+                        return with_etag(Response(body, mimetype="application/json", headers={"X-Cache": "HIT"}), tag)
+
+            # 🔹 Exécution ; des lectures STABLE identiques et simultanées en partagent une seule
+            pg_json, columnar = pg_json_mode(), columnar_mode()
+            if cache_key is not None:
+                status, body, watermark, stable = single_flight.do(
+                    cache_key, lambda: call_rpc(database_id, function_name, decoded, params, pg_json, columnar)
+                )
+            else:
+                status, body, watermark, stable = call_rpc(
+                    database_id, function_name, decoded, params, pg_json, columnar
                 )
+            response = Response(body, status=status, mimetype="application/json")
+            if status != 200:
+                return response
 
-            finally:
-                try:
-                    cur.execute(f"SET ROLE \"{DBUSER}\";")
-                except Exception as e:
-                    logger.warning("⚠️ Impossible de remettre le rôle DBUSER: %s", e)
-                cur.close()
-                conn.close()
+            # --- Cache : mémoriser la lecture (+ ETag), ou l'invalider après une écriture ---
+            if stable and watermark is not None:
+                if not rpc_cache.set_watermark(database_id.upper(), watermark):
+                    # Lecture sur un réplica en retard sur le filigrane connu : ni cache ni ETag
+                    return response
+                cache_key = rpc_cache.make_key(database_id.upper(), function_name, params, decoded, variant)
+                rpc_cache.put(cache_key, watermark, body)
+                tag = rpc_cache.etag(cache_key, watermark)
+                if request.if_none_match.contains_weak(tag):
+                    return with_etag(Response(status=304), tag)
+                with_etag(response, tag)
+            elif not stable:
+                after_write(database_id.upper())
+            return response
 
-            logger.debug("🔹 RPC result: %s", result)
-            return Response(
-                response=json.dumps({"data": result, "error": None}, cls=CustomJSONEncoder),
-                status=200,
-                mimetype="application/json"
-            )
+        except DatabaseUnavailable as e:
+            return unavailable_response(e)
 
         except Exception as e:
             logger.exception("❌ RPC %s failed on database %s", function_name, database_id)
-            return Response(
-                response=json.dumps({"data": None, "error": str(e)}, cls=CustomJSONEncoder),
-                status=500,
-                mimetype="application/json"
-            )
+            return json_response({"data": None, "error": str(e)}, 500)
@@ -0,0 +1,233 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+import flasklib.config as config
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Cache des réponses RPC des fonctions STABLE / IMMUTABLE
+#
+# Une réponse est valable tant que le filigrane de sa base (app_config.updated_at,
+# mis à jour par les triggers de create_triggers.sql) n'a pas bougé :
+#   - le filigrane est relu dans le pipeline de chaque appel RPC, sans aller-retour de plus ;
+#   - entre deux lectures, il est considéré valable RPC_CACHE_WATERMARK_TTL secondes ;
+#   - un appel VOLATILE réussi dans ce processus vide immédiatement le cache de la base.
+#
+# Fenêtre de péremption : une écriture faite par un autre worker (ou directement en base)
+# n'est vue qu'à la prochaine lecture du filigrane, soit jusqu'à RPC_CACHE_WATERMARK_TTL
+# secondes plus tard ; pendant ce délai ce processus peut servir l'ancienne réponse.
+# Seul le worker qui a écrit voit son écriture immédiatement.
+#
+# Niveau 1 : LRU en mémoire borné en nombre d'entrées et en octets.
+# Niveau 2 (facultatif, RPC_CACHE_DIR) : fichiers partagés entre les workers. Une réponse
+# périmée y est visible de tous les processus pendant la même fenêtre : un worker qui n'a
+# pas encore relu le filigrane la sert à ses clients, même s'il ne l'a jamais calculée.
+# RPC_CACHE_WATERMARK_TTL=0 supprime la fenêtre, mais aussi les réponses servies sans
+# aller-retour vers la base (il reste les 304 sur ETag).
+#
+# Le même filigrane sert de validateur HTTP (ETag / If-None-Match), y compris
+# quand le cache est désactivé (RPC_CACHE_ENABLED=0).
+#
+# Le filigrane connu d'une base ne recule jamais : une lecture faite sur un réplica en
+# retard renvoie un filigrane plus ancien ; sa réponse est servie telle quelle, sans
+# cache ni ETag (elle serait sinon validée sous l'ancien filigrane).
+
+# Format fixe (indépendant de DateStyle) : deux filigranes se comparent comme des chaînes
+WATERMARK_SQL = "SELECT to_char(updated_at, 'YYYYMMDDHH24MISSUS') FROM inventory.app_config ORDER BY id LIMIT 1;"
+# Variante pour une connexion au rôle RLS fixé : fonction SECURITY DEFINER (sql/functions)
+WATERMARK_FN_SQL = "SELECT inventory.get_data_watermark();"
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # clé -> (database_id, body, stored_at)
+_size = 0
+_watermarks = {}           # database_id -> (filigrane, checked_at)
+
+
+def is_stable(proto):
+    """Fonction STABLE / IMMUTABLE : même résultat tant que les données ne changent pas."""
+    return proto is not None and proto.get("volatility") in ("s", "i")
+
+
+def make_key(database_id, function_name, params, claims, variant=""):
+    """
+    Clé (base, fonction, paramètres normalisés, rôle) : le rôle PostgreSQL et le rôle
+    applicatif (app_metadata.role) déterminent ce que la RLS laisse voir.
+    """
+    role = (claims.get("role"), (claims.get("app_metadata") or {}).get("role"))
+    raw = json.dumps([function_name, params, role, variant], sort_keys=True, default=str)
+    return f"{database_id}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def watermark_sql(role=None):
+    return WATERMARK_FN_SQL if role else WATERMARK_SQL
+
+
+def fresh_watermark(database_id):
+    """Filigrane connu et encore considéré valable, sinon None (il faut le relire en base)."""
+    known = _watermarks.get(database_id)
+    if known is None or time.monotonic() - known[1] > config.RPC_CACHE_WATERMARK_TTL:
+        return None
+    return known[0]
+
+
+def set_watermark(database_id, watermark):
+    """
+    Enregistre le filigrane lu en base ; s'il a avancé, les réponses de la base sont périmées.
+    Renvoie False pour un filigrane plus ancien que celui déjà connu (réplica en retard) :
+    il est ignoré, et la réponse lue avec lui ne doit être ni mise en cache ni validée.
+    """
+    with _lock:
+        known = _watermarks.get(database_id)
+        if known is not None and watermark < known[0]:
+            logger.debug("⏪ Watermark behind for %s (%s < %s), response not cached", database_id, watermark, known[0])
+            return False
+        if known is not None and known[0] != watermark:
+            logger.debug("🔄 Watermark moved for %s (%s → %s)", database_id, known[0], watermark)
+            _drop(database_id)
+        _watermarks[database_id] = (watermark, time.monotonic())
+        return True
+
+
+def read_watermark(database_id):
+    """Relit le filigrane en base (une requête courte, hors transaction) et l'enregistre."""
+    with get_conn(database_id) as conn:
+        row = conn.execute(WATERMARK_SQL).fetchone()
+    watermark = row[0] if row else None
+    if watermark is not None and not set_watermark(database_id, watermark):
+        return None
+    return watermark
+
+
+def etag(key, watermark):
+    """Validateur HTTP d'une réponse : signature de l'appel + filigrane de la base."""
+    return hashlib.sha256(f"{key}:{watermark}".encode("utf-8")).hexdigest()[:32]
+
+
+def get(key, watermark):
+    """Corps JSON en cache pour la clé et le filigrane courant, ou None."""
+    if not config.RPC_CACHE_ENABLED:
+        return None
+    full_key = f"{key}:{watermark}"
+    now = time.monotonic()
+    with _lock:
+        hit = _entries.get(full_key)
+        if hit is not None:
+            if now - hit[2] <= config.RPC_CACHE_MAX_AGE:
+                _entries.move_to_end(full_key)
+                return hit[1]
+            _remove(full_key)
+
+    body = _disk_get(full_key)
+    if body is not None:
+        _memory_put(full_key, key.split(":", 1)[0], body)
+    return body
+
+
+def put(key, watermark, body):
+    if not config.RPC_CACHE_ENABLED:
+        return
+    full_key = f"{key}:{watermark}"
+    database_id = key.split(":", 1)[0]
+    _memory_put(full_key, database_id, body)
+    _disk_put(full_key, body)
+
+
+def invalidate(database_id=None, forget_watermark=False):
+    """
+    Vide le cache d'une base (ou de toutes les bases). Son filigrane est à relire, mais
+    reste le plancher des suivants, sauf forget_watermark (données remplacées par un
+    restore : le filigrane restauré peut être plus ancien).
+    """
+    global _size
+    with _lock:
+        if database_id is None:
+            _entries.clear()
+            _watermarks.clear()
+            _size = 0
+        else:
+            _drop(database_id)
+            known = _watermarks.pop(database_id, None)
+            if known is not None and not forget_watermark:
+                _watermarks[database_id] = (known[0], float("-inf"))
+
+
+def _memory_put(full_key, database_id, body):
+    global _size
+    if len(body) > config.RPC_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        _remove(full_key)
+        _entries[full_key] = (database_id, body, time.monotonic())
+        _size += len(body)
+        while _entries and (len(_entries) > config.RPC_CACHE_MAX_ENTRIES or _size > config.RPC_CACHE_MAX_BYTES):
+            oldest = next(iter(_entries))
+            _remove(oldest)
+
+
+def _remove(full_key):
+    global _size
+    entry = _entries.pop(full_key, None)
+    if entry is not None:
+        _size -= len(entry[1])
+
+
+def _drop(database_id):
+    for full_key in [k for k, v in _entries.items() if v[0] == database_id]:
+        _remove(full_key)
+
+
+# ---------------------------------------------------------------------
+# Niveau disque (RPC_CACHE_DIR) : un fichier par réponse, clé et filigrane
+# dans le nom, expiré par date de modification
+# ---------------------------------------------------------------------
+
+def _disk_path(full_key):
+    database_id, digest, watermark = full_key.split(":", 2)
+    watermark_digest = hashlib.sha1(watermark.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(config.RPC_CACHE_DIR, database_id, f"{digest}-{watermark_digest}.json")
+
+
+def _disk_get(full_key):
+    if not config.RPC_CACHE_DIR:
+        return None
+    path = _disk_path(full_key)
+    try:
+        if time.time() - os.path.getmtime(path) > config.RPC_CACHE_MAX_AGE:
+            os.remove(path)
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _disk_put(full_key, body):
+    if not config.RPC_CACHE_DIR:
+        return
+    path = _disk_path(full_key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)  # écriture atomique, lisible par les autres workers
+        _disk_prune(os.path.dirname(path))
+    except OSError as e:
+        logger.warning("⚠️ RPC cache disk write failed: %s", e)
+
+
+def _disk_prune(directory):
+    """Supprime les fichiers expirés du dossier de la base (y compris ceux des anciens filigranes)."""
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > config.RPC_CACHE_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,71 @@
+import logging
+import threading
+import flasklib.config as config
+from .db import DatabaseUnavailable
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Coalescence des appels identiques simultanés (single-flight)
+#
+# Le premier appel d'une clé l'exécute ; ceux qui arrivent pendant son exécution
+# attendent et reçoivent le même résultat (ou une exception équivalente à celle du premier).
+# Portée : le processus (threads d'un worker gunicorn).
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+def _follower_error(error):
+    """
+    Exception à lever dans un appel en attente quand l'exécution partagée a échoué.
+    Nouvelle instance (l'originale en cause) : relancer la même depuis plusieurs threads
+    mélangerait leurs __traceback__.
+    """
+    if isinstance(error, DatabaseUnavailable):
+        return DatabaseUnavailable(str(error), error.retry_after)
+    return RuntimeError(str(error))
+
+
+_lock = threading.Lock()
+_flights = {}   # clé -> _Flight en cours
+
+
+def do(key, fn):
+    """Exécute fn() une seule fois pour tous les appels simultanés de même clé."""
+    if not config.RPC_SINGLE_FLIGHT_ENABLED:
+        return fn()
+
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+        else:
+            flight.followers += 1
+
+    if not leader:
+        if flight.done.wait(config.RPC_SINGLE_FLIGHT_WAIT):
+            if flight.error is not None:
+                raise _follower_error(flight.error) from flight.error
+            return flight.result
+        # Exécution en tête trop longue : on n'attend pas davantage
+        logger.warning("⏳ Single-flight wait exceeded for %s, running call separately", key.split(":", 1)[0])
+        return fn()
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _flights.pop(key, None)
+        if flight.followers:
+            logger.debug("🔗 Single-flight shared one execution with %d call(s)", flight.followers)
+        flight.done.set()
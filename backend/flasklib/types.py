@@ -3,74 +3,174 @@ from psycopg.types.json import Json
 from datetime import datetime, date, time, timedelta
 import uuid
 
-def get_sql_value(name: str, typ: str, params: dict):
-    if name not in params:
-        raise ValueError(f"Missing parameter: {name}")
+# 🔹 Valeurs considérées comme NULL (la chaîne vide reste une chaîne pour les types texte)
+NULL_TEXT_VALUES = (None, "{}", "null", "None")
+NULL_VALUES = (None, "", "{}", "null", "None")
 
-    value = params[name]
+TEXT_TYPES = ("text", "varchar", "char", "character varying", "character", "name")
+INT_TYPES = ("integer", "int4", "smallint", "int2", "bigint", "int8")
+FLOAT_TYPES = ("numeric", "float", "float8", "double precision", "real", "float4")
 
-    # 🔹 Comportement conditionnel selon le type
-    if typ in ("text", "varchar", "char"):
-        # On NE convertit pas les chaînes vides en NULL
-        if value is None or value in ("{}", "null", "None"):
-            return None
-        return str(value)
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_float(value):
+    return float(value)
+
+
+def _to_text(value):
+    return str(value)
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    val_lower = str(value).lower()
+    if val_lower in ("true", "1", "t"):
+        return True
+    elif val_lower in ("false", "0", "f"):
+        return False
     else:
-        # Pour les autres types, la chaîne vide est considérée comme NULL
-        if value in (None, "", "{}", "null", "None"):
-            return None
+        raise ValueError(f"Cannot convert {value!r} to boolean")
 
-    if typ in ("integer", "int4"):
-        return int(value)
-    elif typ in ("numeric", "float", "float8", "double precision"):
-        return float(value)
-    elif typ == "boolean":
-        if isinstance(value, bool):
-            return value
-        val_lower = str(value).lower()
-        if val_lower in ("true", "1", "t"):
-            return True
-        elif val_lower in ("false", "0", "f"):
-            return False
-        else:
-            raise ValueError(f"Cannot convert {value!r} to boolean")
-    elif typ in ("text", "varchar", "char"):
-        return str(value)
-    elif typ in ("json", "jsonb"):
-        if isinstance(value, (dict, list)):
-            return Json(value, dumps=json.dumps)
-        if isinstance(value, str):
-            return Json(json.loads(value), dumps=json.dumps)
-    elif typ in ("timestamptz", "timestamp with time zone"):
-        if isinstance(value, datetime):
-            return value
-        if isinstance(value, str):
-            v = value.strip().lower()
-            if v.endswith("z"):
-                v = v[:-1] + "+00:00"
-            return datetime.fromisoformat(v)
-    elif typ == "date":
-        if isinstance(value, date):
-            return value
-        if isinstance(value, str):
-            return date.fromisoformat(value)
-    elif typ == "time":
-        if isinstance(value, time):
-            return value
-        if isinstance(value, str):
-            return time.fromisoformat(value)
-    elif typ == "interval":
-        if isinstance(value, timedelta):
-            return value
-        if isinstance(value, str):
-            parts = value.strip().split()
-            if len(parts) == 2:
-                days = int(parts[0])
-                h, m, s = map(int, parts[1].split(":"))
-                return timedelta(days=days, hours=h, minutes=m, seconds=s)
-    elif typ == "uuid":
-        if isinstance(value, uuid.UUID):
-            return value
-        return uuid.UUID(str(value))
 
+def _to_json(value):
+    if isinstance(value, Json):
+        return value
+    if isinstance(value, str):
+        return Json(json.loads(value), dumps=json.dumps)
+    return Json(value, dumps=json.dumps)
+
+
+def _to_timestamptz(value):
+    if isinstance(value, str):
+        v = value.strip().lower()
+        if v.endswith("z"):
+            v = v[:-1] + "+00:00"
+        return datetime.fromisoformat(v)
+    return value
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _to_time(value):
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    return value
+
+
+def _to_interval(value):
+    if isinstance(value, str):
+        parts = value.strip().split()
+        if len(parts) == 2 and parts[1].count(":") == 2:
+            days = int(parts[0])
+            h, m, s = map(int, parts[1].split(":"))
+            return timedelta(days=days, hours=h, minutes=m, seconds=s)
+        # Autres formats ('1 day', '6 hours', 'P1D'...) : interprétés par le cast ::interval
     return value
+
+
+def _to_uuid(value):
+    if isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def _identity(value):
+    # Types sans conversion Python (enum, timestamp sans fuseau...) : PostgreSQL
+    # interprète la valeur grâce au cast explicite de la requête
+    return value
+
+
+def _scalar_converter(typ: str):
+    if typ in TEXT_TYPES:
+        return _to_text
+    if typ in INT_TYPES:
+        return _to_int
+    if typ in FLOAT_TYPES:
+        return _to_float
+    if typ in ("boolean", "bool"):
+        return _to_bool
+    if typ in ("json", "jsonb"):
+        return _to_json
+    if typ in ("timestamptz", "timestamp with time zone"):
+        return _to_timestamptz
+    if typ == "date":
+        return _to_date
+    if typ in ("time", "time without time zone"):
+        return _to_time
+    if typ == "interval":
+        return _to_interval
+    if typ == "uuid":
+        return _to_uuid
+    return _identity
+
+
+def compile_converter(typ: str):
+    """
+    Renvoie la fonction de conversion d'une valeur JSON vers le type PostgreSQL typ.
+    Les tableaux (integer[], inventory.reservable_gender[]...) convertissent chaque élément.
+    """
+    if typ.endswith("[]"):
+        element = compile_converter(typ[:-2])
+
+        def convert_array(value):
+            if value in NULL_VALUES:
+                return None
+            if isinstance(value, str):
+                if value.lstrip().startswith("{"):
+                    return value  # littéral tableau PostgreSQL, interprété par le cast
+                value = [v.strip() for v in value.split(",")]
+            elif not isinstance(value, (list, tuple)):
+                value = [value]
+            return [element(v) for v in value]
+
+        return convert_array
+
+    convert = _scalar_converter(typ)
+    null_values = NULL_TEXT_VALUES if convert is _to_text else NULL_VALUES
+
+    def convert_scalar(value):
+        if value in null_values:
+            return None
+        return convert(value)
+
+    return convert_scalar
+
+
+def compile_call(schema_name: str, function_name: str, arguments: list):
+    """
+    Compile une fois pour toutes l'appel d'une fonction :
+    requête finale (placeholders castés vers le type déclaré), sa variante json_agg
+    et les convertisseurs des arguments.
+    """
+    placeholders = ", ".join(f"%s::{arg['type']}" for arg in arguments)
+    call = f"{schema_name}.{function_name}({placeholders})"
+    return {
+        "sql": f"SELECT * FROM {call};",
+        # Variante où PostgreSQL construit lui-même le tableau JSON du résultat
+        "json_sql": f"SELECT coalesce(json_agg(r), '[]'::json)::text FROM (SELECT * FROM {call}) AS r;",
+        "converters": [(arg["name"], compile_converter(arg["type"])) for arg in arguments],
+    }
+
+
+def bind_arguments(plan: dict, params: dict):
+    """Applique les convertisseurs d'un plan compilé aux paramètres de la requête."""
+    args = []
+    for name, convert in plan["converters"]:
+        if name not in params:
+            raise ValueError(f"Missing parameter: {name}")
+        args.append(convert(params[name]))
+    return args
+
+
+def get_sql_value(name: str, typ: str, params: dict):
+    if name not in params:
+        raise ValueError(f"Missing parameter: {name}")
+    return compile_converter(typ)(params[name])
@@ -1,11 +1,12 @@
 import os
-import json
 import logging
-from flask import Flask, request, Response
+from flask import Flask, request
 from flask_cors import cross_origin
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 from .utils import get_drive_service, get_drive_folder_id, DriveFolderType
+from .json_encoder import json_response
+from .admission import admit
 import flasklib.config as config
 import mimetypes
 from werkzeug.utils import secure_filename
@@ -37,26 +38,25 @@ logger = logging.getLogger(__name__)
 def register_routes(app: Flask):
     @app.route("/upload_to_drive/<database_id>", methods=["POST", "OPTIONS"])
     @cross_origin(origins=config.ALLOWED_ORIGINS, supports_credentials=True)
+    @admit("heavy")
     def upload_to_drive(database_id):
         try:
             file = request.files.get("file")
             folder_type_str = request.form.get("folder_type", "BACKUP").upper()  # BACKUP par défaut
 
             if not file:
-                return Response(
-                    json.dumps({"error": "No file uploaded"}),
-                    status=400,
-                    mimetype="application/json"
+                return json_response(
+                    {"error": "No file uploaded"},
+                    status=400
                 )
 
             # 🔹 Validation folder_type
             try:
                 folder_type = DriveFolderType[folder_type_str]
             except KeyError:
-                return Response(
-                    json.dumps({"error": f"Invalid folder_type: {folder_type_str}"}),
-                    status=400,
-                    mimetype="application/json"
+                return json_response(
+                    {"error": f"Invalid folder_type: {folder_type_str}"},
+                    status=400
                 )
 
             # 🔹 Récupère le dossier Google Drive
@@ -84,12 +84,11 @@ def register_routes(app: Flask):
                         f_out.close()
                         os.remove(local_path)
                         # ⚠ renvoyer JSON d'erreur
-                        return Response(
-                            json.dumps({
+                        return json_response(
+                            {
                                 "status": "error",
                                 "error": f"File too large: exceeds {MAX_FILE_SIZE // 1024} KB"
-                            }),
-                            mimetype="application/json"
+                            }
                         )
                     f_out.write(chunk)
 
@@ -110,30 +109,27 @@ def register_routes(app: Flask):
             os.remove(local_path)
 
             # 🔹 Réponse JSON avec conservation du folder_type
-            return Response(
-                json.dumps({
+            return json_response(
+                {
                     "status": "success",
                     "file_name": uploaded_file["name"],
                     "file_id": uploaded_file["id"],
                     "folder_type": folder_type.value,
                     "drive_url": drive_url,
                     "file_size": total_read
-                }),
-                mimetype="application/json"
+                }
             )
 
         except HttpError as e:
             logger.exception("❌ Google Drive upload failed")
-            return Response(
-                json.dumps({"error": f"Google Drive API error: {e}"}),
-                status=e.resp.status,
-                mimetype="application/json"
+            return json_response(
+                {"error": f"Google Drive API error: {e}"},
+                status=e.resp.status
             )
 
         except Exception as e:
             logger.exception("❌ Unexpected error")
-            return Response(
-                json.dumps({"error": str(e)}),
-                status=500,
-                mimetype="application/json"
+            return json_response(
+                {"error": str(e)},
+                status=500
             )
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import flasklib.config as config
+from .db import get_conn, last_activity
+from . import prototypes
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Préchauffage des bases (Neon / Alwaysdata suspendent le calcul inactif)
+#
+# Au démarrage, un thread de fond ouvre le pool de chaque base de databases.json
+# (sauf "keep_warm": false), exécute un SELECT 1 et charge le cache des prototypes :
+# le réveil de la base n'est plus payé par la première requête utilisateur.
+# Ensuite, toutes les KEEP_WARM_INTERVAL secondes, chaque base est de nouveau sollicitée
+# (0 = préchauffage au démarrage seulement).
+#
+# Le thread appartient au processus qui l'a lancé : un worker issu d'un fork (gunicorn
+# --preload, Passenger) ne l'hérite pas. Il est donc lancé dans chaque worker, par le
+# hook post_fork de gunicorn.conf.py et, à défaut, à la première requête du worker.
+# Jamais à l'import : sous --preload, le processus maître ouvrirait des connexions
+# que ses workers hériteraient.
+
+_state = {}     # database_id -> {"last_ok": float, "latency_ms": int, "error": str | None}
+_started_pid = None
+_start_lock = threading.Lock()
+
+
+def _databases():
+    return [db["baseid"] for db in config.DATABASES if db.get("keep_warm", True)]
+
+
+def warm(database_id):
+    """Emprunte une connexion (réveil de la base si besoin) et précharge les prototypes."""
+    start = time.monotonic()
+    try:
+        with get_conn(database_id) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+                if config.WARMUP_PRELOAD_PROTOTYPES:
+                    prototypes.preload(cur, database_id)
+        latency_ms = int((time.monotonic() - start) * 1000)
+        _state[database_id] = {"last_ok": time.time(), "latency_ms": latency_ms, "error": None}
+        logger.debug("🔥 %s warm (%d ms)", database_id, latency_ms)
+    except Exception as e:
+        previous = _state.get(database_id) or {}
+        _state[database_id] = {"last_ok": previous.get("last_ok"), "latency_ms": None, "error": str(e)}
+        logger.warning("⚠️ Warm-up failed for %s: %s", database_id, e)
+
+
+def _run():
+    # Démarrage : toutes les bases en parallèle (chacune peut mettre plusieurs secondes à se réveiller)
+    threads = [threading.Thread(target=warm, args=(db,), daemon=True) for db in _databases()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    logger.info("🔥 Databases warmed up: %s", ", ".join(
+        f"{db}={'ok' if not s['error'] else 'error'}" for db, s in _state.items()))
+
+    while config.KEEP_WARM_INTERVAL > 0:
+        time.sleep(config.KEEP_WARM_INTERVAL)
+        for database_id in _databases():
+            warm(database_id)
+
+
+def start():
+    """Lance le thread de préchauffage (une seule fois par process, y compris après un fork)."""
+    global _started_pid
+    if not config.WARMUP_ENABLED or _started_pid == os.getpid():
+        return
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    threading.Thread(target=_run, name="db-warmer", daemon=True).start()
+
+
+def status(database_id):
+    """
+    État d'une base pour /health : "warm" si une connexion a abouti (préchauffage ou
+    requête) depuis moins de WARMUP_COLD_AFTER secondes, sinon "cold".
+    """
+    state = _state.get(database_id) or {}
+    last_ok = max(filter(None, (state.get("last_ok"), last_activity(database_id))), default=None)
+    warm_now = last_ok is not None and time.time() - last_ok < config.WARMUP_COLD_AFTER
+    return {
+        "state": "warm" if warm_now else "cold",
+        "last_ok": datetime.fromtimestamp(last_ok, timezone.utc).isoformat() if last_ok else None,
+        "latency_ms": state.get("latency_ms"),
+        "error": state.get("error"),
+    }
+
+
+def register_hooks(app):
+    # Première requête d'un worker sans hook post_fork (Passenger, serveur de développement)
+    app.before_request(start)
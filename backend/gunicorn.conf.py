@@ -0,0 +1,9 @@
+# Configuration gunicorn : chargée automatiquement quand gunicorn est lancé depuis
+# le dossier backend (sinon : gunicorn -c gunicorn.conf.py app_flask:app).
+
+
+def post_fork(server, worker):
+    # Préchauffage et keep-warm propres à chaque worker : un thread lancé dans le
+    # processus maître (--preload) ne survit pas au fork
+    from flasklib import warmup
+    warmup.start()
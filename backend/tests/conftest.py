@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules s'importent comme sur le serveur : depuis le dossier backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+"""
+Compatibilité des sérialiseurs JSON : _dumps_std et _dumps_orjson doivent produire
+les mêmes valeurs que l'ancien CustomJSONEncoder (json.dumps(obj, cls=CustomJSONEncoder)).
+Les octets peuvent différer (espaces, échappement des caractères non ASCII), pas les valeurs.
+"""
+import json
+import math
+from datetime import datetime, date, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from flasklib.json_encoder import CustomJSONEncoder, _dumps_std, _dumps_orjson, orjson
+
+BACKENDS = [
+    pytest.param(_dumps_std, id="json"),
+    pytest.param(_dumps_orjson, id="orjson",
+                 marks=pytest.mark.skipif(orjson is None, reason="orjson non installé")),
+]
+
+PAYLOADS = {
+    "datetime naive": datetime(2025, 3, 14, 9, 26, 53, 589793),
+    "datetime naive sans microsecondes": datetime(2025, 3, 14, 9, 26, 53),
+    "datetime aware UTC": datetime(2025, 3, 14, 9, 26, 53, tzinfo=timezone.utc),
+    "datetime aware +02:00": datetime(2025, 3, 14, 9, 26, 53, 120000, tzinfo=timezone(timedelta(hours=2))),
+    "date": date(2025, 3, 14),
+    "time": time(9, 26, 53),
+    "time microsecondes": time(9, 26, 53, 5),
+    "timedelta": timedelta(days=2, hours=3, minutes=4, seconds=5),
+    "timedelta sans jours": timedelta(hours=1, minutes=30),
+    "timedelta négatif": timedelta(hours=-1),
+    "timedelta négatif jours": timedelta(days=-3, hours=2),
+    "decimal": Decimal("12.50"),
+    "decimal entier": Decimal("42"),
+    "texte non ASCII": "Robe à volants — été ❄ 日本",
+    "grand entier 64 bits": 2 ** 63 - 1,
+    "grand entier > 64 bits": 2 ** 70,
+    "grand entier négatif > 64 bits": -(2 ** 70),
+    "clés non str": {1: "a", 2: "b"},
+}
+
+
+def reference(obj):
+    """Valeurs produites par l'ancien encodeur."""
+    return json.loads(json.dumps(obj, cls=CustomJSONEncoder))
+
+
+def row(value):
+    """Valeur placée comme dans une réponse RPC : {"data": [{"col": value}], "error": null}."""
+    return {"data": [{"col": value}], "error": None}
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+@pytest.mark.parametrize("name", list(PAYLOADS))
+def test_same_values_as_custom_encoder(dumps, name):
+    payload = row(PAYLOADS[name])
+    assert json.loads(dumps(payload)) == reference(payload)
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_mixed_payload(dumps):
+    payload = row(list(PAYLOADS.values()))
+    assert json.loads(dumps(payload)) == reference(payload)
+    assert json.loads(dumps(payload, pretty=True)) == reference(payload)
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_output_is_utf8_bytes(dumps):
+    out = dumps(row("été"))
+    assert isinstance(out, bytes)
+    assert json.loads(out.decode("utf-8"))["data"][0]["col"] == "été"
+
+
+def test_formats():
+    """Formats attendus par le frontend, identiques pour les deux backends."""
+    assert reference(timedelta(days=2, hours=3, minutes=4, seconds=5)) == "2 days 03:04:05"
+    assert reference(timedelta(hours=-1)) == "-1 days 23:00:00"
+    assert reference(datetime(2025, 3, 14, 9, 26, 53, tzinfo=timezone.utc)) == "2025-03-14T09:26:53+00:00"
+    assert reference(time(9, 26, 53)) == "09:26:53"
+    assert reference(Decimal("12.50")) == 12.5
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+@pytest.mark.parametrize("value", [
+    float("nan"), float("inf"), float("-inf"), Decimal("NaN"), Decimal("Infinity"),
+])
+def test_non_finite_numbers_are_null(dumps, value):
+    """
+    Différence voulue avec l'ancien encodeur : il écrivait NaN / Infinity, que JSON.parse
+    refuse ; les deux backends écrivent null.
+    """
+    assert math.isnan(json.loads(json.dumps(float("nan"), cls=CustomJSONEncoder)))
+    out = dumps(row([value, 1.5]))
+    assert b"NaN" not in out and b"Infinity" not in out
+    assert json.loads(out)["data"][0]["col"] == [None, 1.5]
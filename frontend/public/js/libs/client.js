@@ -3,6 +3,35 @@ import { decodeUnicode } from "./helpers.js";
 import { parseJwt, isTokenExpired } from "./auth/jwt.js";
 import { resizeImageToMaxSize } from './image_utils.js';
 
+// ==============================
+// Format colonnes/lignes (?format=columns)
+// { columns: [...], rows: [[...], ...] } → [{ col: val, ... }, ...]
+// ==============================
+export function decodeColumnar(data) {
+  if (!data || !Array.isArray(data.columns) || !Array.isArray(data.rows)) return data;
+  const { columns, rows } = data;
+  return rows.map(row => {
+    const obj = {};
+    for (let i = 0; i < columns.length; i++) obj[columns[i]] = row[i];
+    return obj;
+  });
+}
+
+// ==============================
+// Revalidation des lectures RPC (ETag / If-None-Match)
+// url + paramètres → { etag, text } de la dernière réponse 200 ; un 304 la réutilise
+// ==============================
+const RPC_ETAG_MAX_ENTRIES = 100;
+const rpcEtagCache = new Map();
+
+function rememberRpcResponse(key, etag, text) {
+  rpcEtagCache.delete(key);
+  rpcEtagCache.set(key, { etag, text });
+  if (rpcEtagCache.size > RPC_ETAG_MAX_ENTRIES) {
+    rpcEtagCache.delete(rpcEtagCache.keys().next().value);
+  }
+}
+
 export async function initClient() {
 // 🌞 Premier wake-up (avec fallback éventuel)
 const urls = window.ENV.API_REST_URLS || [];
@@ -213,7 +242,8 @@ token: null, // JWT stocké après login
     // ==============================
     // RPC
     // ==============================
-    async rpc(functionName, params = {}, DEBUG = false) {
+    // columnar : résultat transmis en colonnes/lignes (plus compact), décodé ici
+    async rpc(functionName, params = {}, DEBUG = false, { columnar = false } = {}) {
       this.ensureValidToken(true);
 
       const idBase = localStorage.getItem("currentDataBase");
@@ -234,10 +264,19 @@ token: null, // JWT stocké après login
         Authorization: `Bearer ${this.token}`,
       };
 
+      const query = columnar ? "?format=columns" : "";
+      const url = `${this.baseUrl}/rpc/${idBase}/${functionName}${query}`;
+      const body = JSON.stringify(params || {});
+
+      // 🔁 Réponse déjà reçue : le serveur répond 304 si rien n'a changé
+      const etagKey = `${url}|${body}`;
+      const known = rpcEtagCache.get(etagKey);
+      if (known) headers["If-None-Match"] = known.etag;
+
       const options = {
         method: "POST",
         headers,
-        body: JSON.stringify(params || {}),
+        body,
       };
 
       if (DEBUG) {
@@ -249,7 +288,7 @@ token: null, // JWT stocké après login
       try {
         // 🛑 Attrape absolument TOUT ce que fetch peut throw
       //  console.log(`fetching ${this.baseUrl}/rpc/${idBase}/${functionName}`);
-        res = await fetch(`${this.baseUrl}/rpc/${idBase}/${functionName}`, options);
+        res = await fetch(url, options);
       } catch (err) {
         let msg = "Erreur interne pendant l'appel réseau";
         if (err?.message) msg = err.message;
@@ -261,18 +300,27 @@ token: null, // JWT stocké après login
 
       // ------------------- Décodage JSON ou texte -------------------
       let payload = null;
+      let text = "";
+      if (res.status === 304 && known) {
+        text = known.text;
+      } else {
+        text = await res.text();
+        const etag = res.headers.get("ETag");
+        if (res.ok && etag) rememberRpcResponse(etagKey, etag, text);
+        else if (res.ok) rpcEtagCache.delete(etagKey);
+      }
       try {
-        payload = await res.json();
+        payload = JSON.parse(text);
       } catch (_) {
         // fallback si pas JSON
-        payload = { text: await res.text() };
+        payload = { text };
       }
 
       if (DEBUG) console.log(`🔹 RPC ${functionName} response:`, res);
       if (DEBUG) console.log(`🔹 RPC ${functionName} payload:`, payload);
 
       // ------------------- Gestion propre des erreurs -------------------
-      if (!res.ok) {
+      if (!res.ok && res.status !== 304) {
         let errMsg = `Erreur HTTP ${res.status}`;
 
         if (payload) {
@@ -300,6 +348,51 @@ token: null, // JWT stocké après login
       }
       // ------------------------------------------------------------------
 
+      if (columnar) payload.data = decodeColumnar(payload.data);
+
+      return payload;
+    }
+,
+
+    // ==============================
+    // RPC BATCH
+    // calls : [{ function: "get_categories", params: {} }, ...]
+    // transaction : true => tout ou rien
+    // Renvoie { data: [{ data, error, status }, ...], error }
+    // ==============================
+    async rpcBatch(calls, { transaction = false } = {}, DEBUG = false) {
+      this.ensureValidToken(true);
+
+      const idBase = localStorage.getItem("currentDataBase");
+      if (!idBase) {
+        alert("❌ Aucun identifiant de base défini !");
+        throw new Error("Aucun identifiant de base défini");
+      }
+
+      const res = await fetch(`${this.baseUrl}/rpc/${idBase}/batch`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${this.token}`,
+        },
+        body: JSON.stringify({ calls, transaction }),
+      });
+
+      let payload = null;
+      try {
+        payload = await res.json();
+      } catch (_) {
+        payload = { text: await res.text() };
+      }
+
+      if (DEBUG) console.log("🔹 RPC batch payload:", payload);
+
+      // En mode transaction, l'échec d'un appel annule tout le lot
+      if (!res.ok) {
+        const err = payload?.error ?? payload?.text ?? `Erreur HTTP ${res.status}`;
+        throw new Error(typeof err === "string" ? err : err.message || JSON.stringify(err));
+      }
+
       return payload;
     }
 ,
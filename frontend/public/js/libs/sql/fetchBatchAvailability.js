@@ -0,0 +1,35 @@
+// js/api/fetchBatchAvailability.js
+/**
+ * Disponibilité des lots sur une période : une entrée par lot
+ * @param {object} client - instance du client
+ * @param {object} params - { p_start, p_end, p_granularity, p_batch_ids, p_reservable_ids }
+ * @returns {Promise<Array>} [{ reservable_batch_id, bitmap, busy, isReserved(i) }]
+ *    bitmap : un caractère par créneau ('1' = réservé), mêmes créneaux que fetchAvailability
+ *    busy   : intervalles occupés fusionnés [[début, fin], ...]
+ */
+export async function fetchBatchAvailability(client, params = {}) {
+  const arrayOrNull = (v) => (Array.isArray(v) && v.length ? v : null);
+
+  const rpcParams = {
+    p_start: params.p_start ?? null,
+    p_end: params.p_end ?? null,
+    p_granularity: params.p_granularity ?? '1 day',
+    p_batch_ids: arrayOrNull(params.p_batch_ids),
+    p_reservable_ids: arrayOrNull(params.p_reservable_ids)
+  };
+
+  const { data, error } = await client.rpc('get_batch_availability', rpcParams);
+  if (error) {
+    console.error('[fetchBatchAvailability] Erreur serveur :', error);
+    return [];
+  }
+
+  return (data || []).map(r => ({
+    reservable_batch_id: r.reservable_batch_id,
+    bitmap: r.bitmap || '',
+    busy: r.busy || [],
+    isReserved(slotIndex) {
+      return this.bitmap[slotIndex] === '1';
+    }
+  }));
+}
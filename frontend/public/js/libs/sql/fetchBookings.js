@@ -42,7 +42,7 @@ export async function fetchBookings(client, params = {}) {
     p_organization_ids: orgs,
     p_category_ids: cats,
     p_subcategory_ids: subcats
-  });
+  }, false, { columnar: true });
 
   if (error) {
     console.error('[fetchBookings] Erreur serveur :', error);
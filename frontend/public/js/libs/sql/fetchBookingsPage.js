@@ -0,0 +1,35 @@
+/**
+ * Récupère une page de réservations (pagination par curseur sur start_date, id)
+ * @param {object} client - instance du client
+ * @param {object} params - filtres : { p_start, p_end, p_organization_ids, p_category_ids, p_subcategory_ids }
+ * @param {object} page - { limit, after, columns }
+ *    after   : curseur renvoyé par la page précédente (null pour la première page)
+ *    columns : colonnes coûteuses à calculer (reservables, renter_name...), null = toutes
+ * @returns {Promise<{items: Array, nextCursor: string|null}>}
+ */
+export async function fetchBookingsPage(client, params = {}, { limit = 50, after = null, columns = null } = {}) {
+  const { data, error } = await client.rpc('get_bookings_page', {
+    p_start: params.p_start ?? null,
+    p_end: params.p_end ?? null,
+    p_organization_ids: params.p_organization_ids ?? null,
+    p_category_ids: params.p_category_ids ?? null,
+    p_subcategory_ids: params.p_subcategory_ids ?? null,
+    p_limit: limit,
+    p_after: after,
+    p_columns: Array.isArray(columns) && columns.length ? columns : null
+  }, false, { columnar: true });
+
+  if (error) {
+    console.error('[fetchBookingsPage] Erreur serveur :', error);
+    return { items: [], nextCursor: null };
+  }
+
+  const items = (data || []).map(b => ({
+    ...b,
+    reservables: b.reservables || []
+  }));
+
+  // Page incomplète : plus rien après
+  const nextCursor = items.length === limit ? items[items.length - 1].cursor : null;
+  return { items, nextCursor };
+}
@@ -0,0 +1,40 @@
+// js/api/fetchReservableFacets.js
+/**
+ * Comptes par valeur de filtre pour la barre latérale de l'inventaire
+ * @param {object} client - instance du client
+ * @param {object} filters - mêmes filtres que fetchReservables
+ * @returns {Promise<object>} { total, category: {id: n}, subcategory: {id: n}, style: {id: n},
+ *                              color: {id: n}, gender: {valeur: n}, status: {valeur: n}, is_in_stock: {true|false: n} }
+ *   (clé "null" : objets sans valeur pour la facette)
+ */
+export async function fetchReservableFacets(client, filters = {}) {
+  const arrayOrNull = (v) => (Array.isArray(v) && v.length ? v : null);
+
+  const params = {
+    p_type: filters.p_type ?? null,
+    p_category_ids: arrayOrNull(filters.p_category_ids),
+    p_subcategory_ids: arrayOrNull(filters.p_subcategory_ids),
+    p_gender: arrayOrNull(filters.p_gender),
+    p_style_ids: arrayOrNull(filters.p_style_ids),
+    p_status_ids: arrayOrNull(filters.p_status_ids),
+    p_color_ids: arrayOrNull(filters.p_color_ids),
+    p_start_date: filters.p_start_date ?? null,
+    p_end_date: filters.p_end_date ?? null,
+    p_is_in_stock: filters.p_is_in_stock ?? null,
+    p_privacy_min: filters.p_privacy_min ?? null
+  };
+
+  const facets = { total: 0, category: {}, subcategory: {}, style: {}, color: {}, gender: {}, status: {}, is_in_stock: {} };
+
+  const { data, error } = await client.rpc('get_reservable_facets', params);
+  if (error) {
+    console.error('[fetchReservableFacets] Erreur serveur :', error);
+    return facets;
+  }
+
+  for (const { facet, key, count } of data || []) {
+    if (facet === 'total') facets.total = count;
+    else if (facets[facet]) facets[facet][key] = count;
+  }
+  return facets;
+}
@@ -32,7 +32,7 @@ export async function fetchReservables(client, filters = {}) {
     p_privacy_min: filters.p_privacy_min ?? null
   };
 
-  const { data, error } = await client.rpc('get_reservables', params);
+  const { data, error } = await client.rpc('get_reservables', params, false, { columnar: true });
 
   if (error) {
     console.error('[fetchReservables] Erreur serveur :', error);
@@ -0,0 +1,49 @@
+// js/api/fetchReservablesPage.js
+/**
+ * Récupère une page de réservables (pagination par curseur sur name, id)
+ * @param {object} client - instance du client
+ * @param {object} filters - mêmes filtres que fetchReservables
+ * @param {object} page - { limit, after, columns }
+ *    after   : curseur renvoyé par la page précédente (null pour la première page)
+ *    columns : colonnes coûteuses à calculer (photos, colors, style_names...), null = toutes
+ * @returns {Promise<{items: Array, nextCursor: string|null}>}
+ */
+export async function fetchReservablesPage(client, filters = {}, { limit = 50, after = null, columns = null } = {}) {
+  const arrayOrNull = (v) => (Array.isArray(v) && v.length ? v : null);
+
+  const params = {
+    p_type: filters.p_type ?? null,
+    p_category_ids: arrayOrNull(filters.p_category_ids),
+    p_subcategory_ids: arrayOrNull(filters.p_subcategory_ids),
+    p_gender: arrayOrNull(filters.p_gender),
+    p_style_ids: arrayOrNull(filters.p_style_ids),
+    p_status_ids: arrayOrNull(filters.p_status_ids),
+    p_color_ids: arrayOrNull(filters.p_color_ids),
+    p_start_date: filters.p_start_date ?? null,
+    p_end_date: filters.p_end_date ?? null,
+    p_is_in_stock: filters.p_is_in_stock ?? null,
+    p_privacy_min: filters.p_privacy_min ?? null,
+    p_limit: limit,
+    p_after: after,
+    p_columns: arrayOrNull(columns)
+  };
+
+  const { data, error } = await client.rpc('get_reservables_page', params, false, { columnar: true });
+
+  if (error) {
+    console.error('[fetchReservablesPage] Erreur serveur :', error);
+    return { items: [], nextCursor: null };
+  }
+
+  const items = (data || []).map(item => ({
+    ...item,
+    photos: item.photos || [],
+    style_ids: item.style_ids || [],
+    style_names: item.style_names || [],
+    colors: item.colors || []
+  }));
+
+  // Page incomplète : plus rien après
+  const nextCursor = items.length === limit ? items[items.length - 1].cursor : null;
+  return { items, nextCursor };
+}
@@ -9,12 +9,14 @@ export { upsertAppConfig } from './upsertAppConfig.js';
 // ==========================
 export { fetchOrganizations } from './fetchOrganizations.js';
 export { fetchOrganizationById } from './fetchOrganizationById.js';
+export { searchOrganizations } from './searchOrganizations.js';
 export { upsertOrganization } from './upsertOrganization.js';
 export { deleteOrganization } from './deleteOrganization.js';
 
 export { fetchPersonById } from './fetchPersonById.js';
 export { fetchPersonByEmail } from './fetchPersonByEmail.js';
 export { fetchPersonByName } from './fetchPersonByName.js';
+export { searchPersons } from './searchPersons.js';
 export { upsertPerson } from './upsertPerson.js';
 export { deletePerson } from './deletePerson.js';
 
@@ -24,6 +26,9 @@ export { fetchOrganizationsByPersonId } from './fetchOrganizationsByPersonId.js'
 // STOCK & RÉSERVABLES
 // ==========================
 export { fetchReservables } from './fetchReservables.js';
+export { fetchReservablesPage } from './fetchReservablesPage.js';
+export { searchReservables } from './searchReservables.js';
+export { fetchReservableFacets } from './fetchReservableFacets.js';
 export { fetchReservableById } from './fetchReservableById.js';
 export { createReservable } from './createReservable.js';
 export { updateReservable } from './updateReservable.js';
@@ -50,12 +55,14 @@ export { deleteStyle } from './deleteStyle.js';
 // ==========================
 export { createBooking } from './createBooking.js';
 export { fetchBookings } from './fetchBookings.js';
+export { fetchBookingsPage } from './fetchBookingsPage.js';
 export { fetchBookingById } from './fetchBookingById.js';
 export { updateBooking } from './updateBooking.js';
 export { deleteBooking } from './deleteBooking.js';
 export { upsertBookingReference } from './upsertBookingReference.js';
 export { fetchPlanningMatrix } from './fetchPlanningMatrix.js';
 export { fetchAvailability } from './fetchAvailability.js';
+export { fetchBatchAvailability } from './fetchBatchAvailability.js';
 export { isAvailable } from './isAvailable.js';
 
 // ==========================
@@ -0,0 +1,20 @@
+// js/api/searchOrganizations.js
+/**
+ * Recherche d'organisations pour la saisie assistée (nom, adresse)
+ * Tolère les accents, les mots incomplets et les fautes de frappe ; résultats classés par pertinence.
+ * @param {object} client - instance du client
+ * @param {string} query - texte saisi
+ * @param {number} limit - nombre maximal de résultats (100 au plus)
+ * @returns {Promise<Array>} [{ id, name, address, referent_id, rank }]
+ */
+export async function searchOrganizations(client, query, limit = 20) {
+  if (!query || !query.trim()) return [];
+
+  const { data, error } = await client.rpc('search_organizations', { p_query: query, p_limit: limit });
+
+  if (error) {
+    console.error('[searchOrganizations] Erreur serveur :', error);
+    return [];
+  }
+  return data || [];
+}
@@ -0,0 +1,20 @@
+// js/api/searchPersons.js
+/**
+ * Recherche de personnes pour la saisie assistée (prénom, nom, email)
+ * Tolère les accents, les mots incomplets et les fautes de frappe ; résultats classés par pertinence.
+ * @param {object} client - instance du client
+ * @param {string} query - texte saisi
+ * @param {number} limit - nombre maximal de résultats (100 au plus)
+ * @returns {Promise<Array>} [{ id, first_name, last_name, email, phone, rank }]
+ */
+export async function searchPersons(client, query, limit = 20) {
+  if (!query || !query.trim()) return [];
+
+  const { data, error } = await client.rpc('search_persons', { p_query: query, p_limit: limit });
+
+  if (error) {
+    console.error('[searchPersons] Erreur serveur :', error);
+    return [];
+  }
+  return data || [];
+}
@@ -0,0 +1,25 @@
+// js/api/searchReservables.js
+/**
+ * Recherche d'objets pour la saisie assistée (nom, numéro de série, description, taille)
+ * Tolère les accents, les mots incomplets et les fautes de frappe ; résultats classés par pertinence.
+ * @param {object} client - instance du client
+ * @param {string} query - texte saisi
+ * @param {object} options - { limit, p_type, p_privacy_min }
+ * @returns {Promise<Array>} [{ id, name, serial_id, size, inventory_type, category_id, status, is_in_stock, rank }]
+ */
+export async function searchReservables(client, query, { limit = 20, p_type = null, p_privacy_min = null } = {}) {
+  if (!query || !query.trim()) return [];
+
+  const { data, error } = await client.rpc('search_reservables', {
+    p_query: query,
+    p_limit: limit,
+    p_type,
+    p_privacy_min
+  });
+
+  if (error) {
+    console.error('[searchReservables] Erreur serveur :', error);
+    return [];
+  }
+  return data || [];
+}
@@ -68,8 +68,8 @@ if [ "$STEP" -le 2 ]; then
 fi
 
 
-# Étape 3 : Création des triggers
-if [ "$STEP" -le 3 ]; then
+# Étape 3 : Création des triggers (déjà faite par reset_functions.sh à l'étape 2)
+if [ "$STEP" -eq 3 ]; then
     echo "▶ Étape 3 : Création des triggers..."
     $PSQL -f "$SQL_SCRIPTS_DIR/create_triggers.sql"
 fi
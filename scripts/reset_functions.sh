@@ -15,6 +15,10 @@ SQL_SCRIPTS_DIR="$ROOT_DIR/sql"
 # Supprimer toutes les fonctions existantes (optionnel)
 $PSQL -f "$SQL_SCRIPTS_DIR/drop_all_functions.sql"
 
+# Mettre le schéma à niveau (tables / colonnes lues par les fonctions)
+echo "📌 Mise à niveau du schéma"
+$PSQL -f "$SQL_SCRIPTS_DIR/migrate_schema.sql"
+
 # Vérifie s'il y a des fichiers function_*.sql dans le dossier
 files_found=false
 for file in $SQL_SCRIPTS_DIR/functions/*.sql; do
@@ -41,3 +45,7 @@ done
 
 
 echo "✅ Toutes les fonctions sont importées."
+
+# Recréer les triggers supprimés avec les fonctions et recalculer reservable_tags
+echo "📌 Création des triggers"
+$PSQL -f "$SQL_SCRIPTS_DIR/create_triggers.sql"
@@ -1,9 +1,13 @@
+-- Script rejouable : DROP TRIGGER IF EXISTS + CREATE TRIGGER
+-- (CREATE OR REPLACE TRIGGER n'existe qu'à partir de PostgreSQL 14)
 DO $$
 DECLARE
   tbl TEXT;
   tables_to_watch TEXT[] := ARRAY[
     'reservable_booking',
     'reservable_style_link',
+    'reservable_color_link',
+    'reservable_batch_link',
     'reservable',
     'booking_reference',
     'reservable_style',
@@ -12,10 +16,13 @@ DECLARE
     'reservable_batch',
     'organization',
     'person',
+    'organization_person',
+    'color',
     'storage_location'
   ];
 BEGIN
   FOREACH tbl IN ARRAY tables_to_watch LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS trigger_%I_update ON inventory.%I;', tbl, tbl);
     EXECUTE format(
       'CREATE TRIGGER trigger_%I_update
        AFTER INSERT OR UPDATE OR DELETE ON inventory.%I
@@ -26,3 +33,40 @@ BEGIN
   END LOOP;
 END;
 $$;
+
+
+-- ===========================
+-- Cache styles / couleurs par objet (inventory.reservable_tags)
+-- ===========================
+DROP TRIGGER IF EXISTS trigger_reservable_tags_reservable ON inventory.reservable;
+CREATE TRIGGER trigger_reservable_tags_reservable
+AFTER INSERT ON inventory.reservable
+FOR EACH ROW
+EXECUTE FUNCTION inventory.sync_reservable_tags();
+
+DROP TRIGGER IF EXISTS trigger_reservable_tags_style_link ON inventory.reservable_style_link;
+CREATE TRIGGER trigger_reservable_tags_style_link
+AFTER INSERT OR UPDATE OR DELETE ON inventory.reservable_style_link
+FOR EACH ROW
+EXECUTE FUNCTION inventory.sync_reservable_tags();
+
+DROP TRIGGER IF EXISTS trigger_reservable_tags_color_link ON inventory.reservable_color_link;
+CREATE TRIGGER trigger_reservable_tags_color_link
+AFTER INSERT OR UPDATE OR DELETE ON inventory.reservable_color_link
+FOR EACH ROW
+EXECUTE FUNCTION inventory.sync_reservable_tags();
+
+DROP TRIGGER IF EXISTS trigger_reservable_tags_style ON inventory.reservable_style;
+CREATE TRIGGER trigger_reservable_tags_style
+AFTER UPDATE OF name ON inventory.reservable_style
+FOR EACH ROW
+EXECUTE FUNCTION inventory.sync_reservable_tags();
+
+DROP TRIGGER IF EXISTS trigger_reservable_tags_color ON inventory.color;
+CREATE TRIGGER trigger_reservable_tags_color
+AFTER UPDATE OF name, hex_code ON inventory.color
+FOR EACH ROW
+EXECUTE FUNCTION inventory.sync_reservable_tags();
+
+-- Remplissage initial (et rattrapage après un restore, triggers désactivés)
+SELECT inventory.refresh_reservable_tags(ARRAY(SELECT id FROM inventory.reservable));
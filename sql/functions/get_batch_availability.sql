@@ -0,0 +1,145 @@
+-- get_batch_availability.sql
+-- Disponibilité des lots entre p_start et p_end : une ligne par lot (au lieu d'une
+-- ligne par lot x créneau de get_availability), calculée à partir des réservations
+-- sans sous-requête par créneau.
+--
+--   bitmap : un caractère par créneau (mêmes créneaux que get_availability),
+--            '1' si le créneau est chevauché par une réservation, '0' sinon
+--   busy   : intervalles occupés fusionnés et bornés à la fenêtre, [[début, fin], ...]
+--
+-- Les réservations de chaque lot sont fusionnées (îlots : fenêtre max() courante sur
+-- les réservations triées, compatible PostgreSQL 13, sans range_agg / multirange), puis
+-- chaque intervalle occupé est converti en plage d'indices de créneaux par recherche
+-- dichotomique (width_bucket) sur les bornes des créneaux : coût proportionnel au nombre
+-- de lots et de réservations de la fenêtre, pas au nombre de cellules.
+--
+-- Filtres facultatifs : p_batch_ids (lots), p_reservable_ids (lots contenant ces objets).
+CREATE OR REPLACE FUNCTION inventory.get_batch_availability(
+  p_start TIMESTAMP,
+  p_end TIMESTAMP,
+  p_granularity INTERVAL DEFAULT INTERVAL '1 day',
+  p_batch_ids INT[] DEFAULT NULL,
+  p_reservable_ids INT[] DEFAULT NULL
+)
+RETURNS TABLE (
+  reservable_batch_id INT,
+  bitmap TEXT,
+  busy JSONB
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH slots AS (
+    -- Bornes des créneaux : début de chacun, puis fin du dernier
+    SELECT
+      s.starts || (s.starts[cardinality(s.starts)] + p_granularity) AS bounds,
+      cardinality(s.starts) AS n,
+      tsrange(p_start, s.starts[cardinality(s.starts)] + p_granularity, '[)') AS window_range
+    FROM (
+      SELECT array_agg(g ORDER BY g) AS starts
+      FROM generate_series(p_start, p_end - p_granularity, p_granularity) AS g
+    ) s
+    WHERE s.starts IS NOT NULL
+  ),
+  batches AS (
+    SELECT rb.id
+    FROM inventory.reservable_batch rb
+    WHERE (p_batch_ids IS NULL OR rb.id = ANY(p_batch_ids))
+      AND (
+        p_reservable_ids IS NULL
+        OR EXISTS (
+          SELECT 1
+          FROM inventory.reservable_batch_link rbl
+          WHERE rbl.batch_id = rb.id
+            AND rbl.reservable_id = ANY(p_reservable_ids)
+        )
+      )
+  ),
+  clipped AS (
+    -- Réservations de la fenêtre, bornées à celle-ci ; intervalles ouverts : une
+    -- réservation qui finit au début d'un créneau ne l'occupe pas (cf. get_availability)
+    SELECT
+      b.reservable_batch_id AS batch_id,
+      greatest(b.start_date, p_start) AS lo,
+      least(b.end_date, upper(s.window_range)) AS hi
+    FROM inventory.reservable_booking b
+    JOIN batches ON batches.id = b.reservable_batch_id
+    CROSS JOIN slots s
+    WHERE b.start_date < upper(s.window_range)
+      AND b.end_date > p_start
+  ),
+  busy_islands AS (
+    -- Nouvel îlot quand la réservation commence après (ou à) la fin de toutes les précédentes
+    SELECT
+      batch_id, lo, hi,
+      count(*) FILTER (WHERE prev_hi IS NULL OR lo >= prev_hi)
+        OVER (PARTITION BY batch_id ORDER BY lo, hi ROWS UNBOUNDED PRECEDING) AS island
+    FROM (
+      SELECT
+        c.*,
+        max(c.hi) OVER (
+          PARTITION BY c.batch_id ORDER BY c.lo, c.hi
+          ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        ) AS prev_hi
+      FROM clipped c
+    ) o
+  ),
+  busy AS (
+    -- Intervalles occupés fusionnés
+    SELECT batch_id, min(lo) AS lo, max(hi) AS hi
+    FROM busy_islands
+    GROUP BY batch_id, island
+  ),
+  busy_slots AS (
+    -- Intervalle occupé → plage d'indices [premier, dernier] des créneaux chevauchés
+    SELECT
+      bu.batch_id,
+      width_bucket(bu.lo, s.bounds) AS first_slot,
+      width_bucket(bu.hi, s.bounds) - (s.bounds[width_bucket(bu.hi, s.bounds)] = bu.hi)::int AS last_slot
+    FROM busy bu
+    CROSS JOIN slots s
+  ),
+  slot_islands AS (
+    -- Deux intervalles peuvent toucher le même créneau : plages d'indices fusionnées à leur tour
+    SELECT batch_id, min(first_slot) AS first_slot, max(last_slot) AS last_slot
+    FROM (
+      SELECT
+        batch_id, first_slot, last_slot,
+        count(*) FILTER (WHERE prev_last IS NULL OR first_slot > prev_last)
+          OVER (PARTITION BY batch_id ORDER BY first_slot, last_slot ROWS UNBOUNDED PRECEDING) AS island
+      FROM (
+        SELECT
+          bs.*,
+          max(bs.last_slot) OVER (
+            PARTITION BY bs.batch_id ORDER BY bs.first_slot, bs.last_slot
+            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+          ) AS prev_last
+        FROM busy_slots bs
+      ) o
+    ) i
+    GROUP BY batch_id, island
+  )
+  SELECT
+    bt.id AS reservable_batch_id,
+    COALESCE(bits.bitmap, repeat('0', s.n)) AS bitmap,
+    COALESCE(
+      (SELECT jsonb_agg(jsonb_build_array(bu.lo, bu.hi) ORDER BY bu.lo) FROM busy bu WHERE bu.batch_id = bt.id),
+      '[]'::jsonb
+    ) AS busy
+  FROM batches bt
+  CROSS JOIN slots s
+  LEFT JOIN LATERAL (
+    -- Balayage des plages triées : zéros jusqu'à la plage, puis uns
+    SELECT
+      string_agg(
+        repeat('0', first_slot - COALESCE(prev_last, 0) - 1) || repeat('1', last_slot - first_slot + 1),
+        '' ORDER BY first_slot
+      ) || repeat('0', s.n - max(last_slot)) AS bitmap
+    FROM (
+      SELECT si.*, lag(si.last_slot) OVER (ORDER BY si.first_slot) AS prev_last
+      FROM slot_islands si
+      WHERE si.batch_id = bt.id
+    ) u
+    HAVING count(*) > 0
+  ) bits ON true
+  ORDER BY bt.id;
+$$;
@@ -0,0 +1,114 @@
+-- ===========================================
+-- Page de get_bookings : mêmes filtres, pagination par curseur (keyset)
+-- sur (start_date, id) et projection des colonnes coûteuses.
+--
+--   p_limit   : nombre de lignes de la page (NULL = toutes)
+--   p_after   : curseur opaque de la dernière ligne de la page précédente
+--               (colonne "cursor"), NULL pour la première page
+--   p_columns : colonnes à calculer parmi batch_description, renter_name,
+--               booking_person_name, reservables (NULL = toutes). Les autres sont renvoyées à NULL.
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.get_bookings_page(
+  p_start TIMESTAMP DEFAULT NULL,
+  p_end   TIMESTAMP DEFAULT NULL,
+  p_organization_ids INT[] DEFAULT NULL,
+  p_category_ids INT[] DEFAULT NULL,
+  p_subcategory_ids INT[] DEFAULT NULL,
+  p_limit INT DEFAULT NULL,
+  p_after TEXT DEFAULT NULL,
+  p_columns TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (
+  booking_id INT,
+  reservable_batch_id INT,
+  batch_description TEXT,
+  renter_organization_id INT,
+  renter_name TEXT,
+  booking_reference_id INT,
+  start_date TIMESTAMP,
+  end_date TIMESTAMP,
+  booked_at TIMESTAMP,
+  booking_person_id INT,
+  booking_person_name TEXT,
+  reservables JSONB,
+  cursor TEXT
+)
+LANGUAGE plpgsql STABLE
+AS $$
+DECLARE
+  v_all BOOLEAN := p_columns IS NULL;
+  v_after_start TIMESTAMP;
+  v_after_id INT;
+BEGIN
+  -- 🔹 Curseur = base64 de [start_date, id] de la dernière ligne déjà reçue
+  IF p_after IS NOT NULL THEN
+    BEGIN
+      SELECT (c->>0)::timestamp, (c->>1)::int
+      INTO v_after_start, v_after_id
+      FROM (SELECT convert_from(decode(p_after, 'base64'), 'UTF8')::jsonb AS c) s;
+    EXCEPTION WHEN OTHERS THEN
+      RAISE EXCEPTION 'Curseur de pagination invalide : %', p_after;
+    END;
+  END IF;
+
+  RETURN QUERY
+  SELECT
+    b.id,
+    b.reservable_batch_id,
+    CASE WHEN v_all OR 'batch_description' = ANY(p_columns) THEN rb.description::text END AS batch_description,
+    b.renter_organization_id,
+    CASE WHEN v_all OR 'renter_name' = ANY(p_columns) THEN o.name::text END AS renter_name,
+    b.booking_reference_id,
+    b.start_date,
+    b.end_date,
+    b.booked_at,
+    b.booking_person_id,
+    CASE WHEN v_all OR 'booking_person_name' = ANY(p_columns)
+         THEN CONCAT_WS(' ', p.first_name, p.last_name) END AS booking_person_name,
+    CASE WHEN v_all OR 'reservables' = ANY(p_columns) THEN (
+      SELECT jsonb_agg(
+        jsonb_build_object(
+          'id', r.id,
+          'name', r.name,
+          'category_id', r.category_id,
+          'category_name', c.name,
+          'subcategory_id', r.subcategory_id,
+          'subcategory_name', sc.name,
+          'photos', r.photos
+        ) ORDER BY r.name
+      )
+      FROM inventory.reservable r
+      JOIN inventory.reservable_batch_link rbl ON rbl.reservable_id = r.id
+      LEFT JOIN inventory.reservable_category c ON c.id = r.category_id
+      LEFT JOIN inventory.reservable_subcategory sc ON sc.id = r.subcategory_id
+      WHERE rbl.batch_id = b.reservable_batch_id
+    ) END AS reservables,
+    translate(encode(convert_to(jsonb_build_array(b.start_date, b.id)::text, 'UTF8'), 'base64'), E'\n', '') AS cursor
+  FROM inventory.reservable_booking b
+  JOIN inventory.reservable_batch rb ON rb.id = b.reservable_batch_id
+  LEFT JOIN inventory.organization o ON o.id = b.renter_organization_id
+  LEFT JOIN inventory.person p ON p.id = b.booking_person_id
+  WHERE (v_after_start IS NULL OR (b.start_date, b.id) > (v_after_start, v_after_id))
+    AND (p_start IS NULL OR b.end_date > p_start)
+    AND (p_end IS NULL OR b.start_date < p_end)
+    AND (p_organization_ids IS NULL OR b.renter_organization_id = ANY(p_organization_ids))
+    AND (
+      p_category_ids IS NULL OR EXISTS (
+        SELECT 1 FROM inventory.reservable r
+        JOIN inventory.reservable_batch_link rbl2 ON rbl2.reservable_id = r.id
+        WHERE rbl2.batch_id = b.reservable_batch_id
+          AND r.category_id = ANY(p_category_ids)
+      )
+    )
+    AND (
+      p_subcategory_ids IS NULL OR EXISTS (
+        SELECT 1 FROM inventory.reservable r
+        JOIN inventory.reservable_batch_link rbl3 ON rbl3.reservable_id = r.id
+        WHERE rbl3.batch_id = b.reservable_batch_id
+          AND r.subcategory_id = ANY(p_subcategory_ids)
+      )
+    )
+  ORDER BY b.start_date, b.id
+  LIMIT p_limit;
+END;
+$$;
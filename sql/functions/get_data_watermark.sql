@@ -0,0 +1,13 @@
+-- ===========================================
+-- Filigrane des données : app_config.updated_at, mis à jour par les triggers
+-- de create_triggers.sql à chaque écriture. Sert de clé de validité au cache
+-- RPC du backend ; SECURITY DEFINER pour être lisible quel que soit le rôle RLS.
+-- Format fixe, comparable comme une chaîne (même requête que rpc_cache.WATERMARK_SQL).
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.get_data_watermark()
+RETURNS TEXT
+LANGUAGE sql STABLE
+SECURITY DEFINER
+AS $$
+    SELECT to_char(updated_at, 'YYYYMMDDHH24MISSUS') FROM inventory.app_config ORDER BY id LIMIT 1;
+$$;
@@ -0,0 +1,72 @@
+-- ===========================================
+-- Comptes par valeur de filtre pour la barre latérale de l'inventaire
+--
+-- Mêmes paramètres et mêmes filtres que get_reservables (délégués à
+-- get_reservables_page) ; les objets retenus sont lus une seule fois puis
+-- comptés par catégorie, sous-catégorie, genre, statut et présence en stock
+-- (GROUPING SETS), et par style et couleur (cache inventory.reservable_tags).
+--
+-- Une ligne par (facet, key) :
+--   facet : 'total', 'category', 'subcategory', 'style', 'color', 'gender', 'status', 'is_in_stock'
+--   key   : identifiant (category, subcategory, style, color) ou valeur (gender, status,
+--           is_in_stock) ; NULL pour les objets sans valeur (et pour 'total')
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.get_reservable_facets(
+    p_type inventory.reservable_type DEFAULT NULL,
+    p_category_ids INT[] DEFAULT NULL,
+    p_subcategory_ids INT[] DEFAULT NULL,
+    p_gender inventory.reservable_gender[] DEFAULT NULL,
+    p_style_ids INT[] DEFAULT NULL,
+    p_status_ids inventory.reservable_status[] DEFAULT NULL,
+    p_start_date TIMESTAMP DEFAULT NULL,
+    p_end_date TIMESTAMP DEFAULT NULL,
+    p_is_in_stock BOOLEAN DEFAULT NULL,
+    p_privacy_min inventory.privacy_type DEFAULT NULL,
+    p_color_ids INT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    facet TEXT,
+    key TEXT,
+    count INT
+)
+LANGUAGE plpgsql STABLE
+SECURITY DEFINER
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH matched AS MATERIALIZED (
+        -- p_columns vide : aucune colonne coûteuse n'est calculée
+        SELECT p.id, p.category_id, p.subcategory_id, p.gender, p.status, p.is_in_stock,
+               t.style_ids, t.color_ids
+        FROM inventory.get_reservables_page(
+            p_type, p_category_ids, p_subcategory_ids, p_gender, p_style_ids, p_status_ids,
+            p_start_date, p_end_date, p_is_in_stock, p_privacy_min, p_color_ids,
+            NULL, NULL, ARRAY[]::TEXT[]
+        ) p
+        LEFT JOIN inventory.reservable_tags t ON t.reservable_id = p.id
+    )
+    SELECT
+        CASE
+            WHEN GROUPING(m.category_id) = 0 THEN 'category'
+            WHEN GROUPING(m.subcategory_id) = 0 THEN 'subcategory'
+            WHEN GROUPING(m.gender) = 0 THEN 'gender'
+            WHEN GROUPING(m.status) = 0 THEN 'status'
+            WHEN GROUPING(m.is_in_stock) = 0 THEN 'is_in_stock'
+            ELSE 'total'
+        END,
+        COALESCE(m.category_id::text, m.subcategory_id::text, m.gender::text, m.status, m.is_in_stock::text),
+        count(*)::int
+    FROM matched m
+    GROUP BY GROUPING SETS ((m.category_id), (m.subcategory_id), (m.gender), (m.status), (m.is_in_stock), ())
+
+    UNION ALL
+    SELECT 'style', s.id::text, count(*)::int
+    FROM matched m, unnest(m.style_ids) AS s(id)
+    GROUP BY s.id
+
+    UNION ALL
+    SELECT 'color', c.id::text, count(*)::int
+    FROM matched m, unnest(m.color_ids) AS c(id)
+    GROUP BY c.id;
+END;
+$$;
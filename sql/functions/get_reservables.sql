@@ -45,111 +45,41 @@ LANGUAGE plpgsql STABLE
 SECURITY DEFINER
 AS $$
 BEGIN
+    -- 🔹 Liste complète : une seule page sans limite, toutes colonnes (cf. get_reservables_page)
     RETURN QUERY
     SELECT
-        r.id,
-        r.name::text,
-        r.serial_id::text,
-        r.description::text,
-        r.price_per_day,
-        r.photos,
-        r.gender,
-        r.privacy,
-        r.inventory_type,
-        NULL::INT AS type_id,
-        r.inventory_type::text AS type_name,
-        r.category_id,
-        c.name::text AS category_name,
-        r.subcategory_id,
-        sc.name::text AS subcategory_name,
-        r.status::text AS status,
-        r.quality::text AS quality,
-        r.is_in_stock,
-        r.storage_location_id,
-        sl.name::text AS storage_location_name,
-        r.owner_id,
-        o.name::text AS owner_name,
-        r.manager_id,
-        m.name::text AS manager_name,
-        r.size::text,
-        array_agg(DISTINCT rs.id)   FILTER (WHERE rs.id IS NOT NULL) AS style_ids,
-        array_agg(DISTINCT rs.name::text) FILTER (WHERE rs.name IS NOT NULL) AS style_names,  -- ✅ cast ici
-
-        COALESCE(
-            jsonb_agg(
-                DISTINCT jsonb_build_object(
-                    'id', c2.id,
-                    'name', c2.name,
-                    'hex_code', c2.hex_code
-                )
-            ) FILTER (WHERE c2.id IS NOT NULL),
-            '[]'::jsonb
-        ) AS colors
-
-    FROM inventory.reservable r
-    LEFT JOIN inventory.reservable_category c ON c.id = r.category_id
-    LEFT JOIN inventory.reservable_subcategory sc ON sc.id = r.subcategory_id
-    LEFT JOIN inventory.storage_location sl ON sl.id = r.storage_location_id
-    LEFT JOIN inventory.organization o ON o.id = r.owner_id
-    LEFT JOIN inventory.organization m ON m.id = r.manager_id
-
-    LEFT JOIN inventory.reservable_style_link rsl ON rsl.reservable_id = r.id
-    LEFT JOIN inventory.reservable_style rs ON rs.id = rsl.style_id
-
-    LEFT JOIN inventory.reservable_color_link rc ON rc.reservable_id = r.id
-    LEFT JOIN inventory.color c2 ON c2.id = rc.color_id
-
-    WHERE
-        (p_type IS NULL OR r.inventory_type = p_type)
-        AND (p_category_ids IS NULL OR r.category_id = ANY(p_category_ids))
-        AND (p_subcategory_ids IS NULL OR r.subcategory_id = ANY(p_subcategory_ids))
-        AND (p_gender IS NULL OR r.gender = ANY(p_gender))
-        AND (p_status_ids IS NULL OR r.status = ANY(p_status_ids))
-
-        AND (
-            p_privacy_min IS NULL
-            OR array_position(ARRAY['hidden','private','public']::text[], r.privacy::text)
-                >= array_position(ARRAY['hidden','private','public']::text[], p_privacy_min::text)
-        )
-
-        AND (p_is_in_stock IS NULL OR p_is_in_stock = r.is_in_stock)
-
-        AND (
-            p_style_ids IS NULL
-            OR EXISTS (
-                SELECT 1
-                FROM inventory.reservable_style_link rsl2
-                WHERE rsl2.reservable_id = r.id
-                AND rsl2.style_id = ANY(p_style_ids)
-            )
-        )
-
-        AND (
-            p_color_ids IS NULL
-            OR NOT EXISTS (
-                SELECT 1
-                FROM unnest(p_color_ids) AS needed_color(id)
-                WHERE NOT EXISTS (
-                    SELECT 1
-                    FROM inventory.reservable_color_link rc3
-                    WHERE rc3.reservable_id = r.id
-                      AND rc3.color_id = needed_color.id
-                )
-            )
-        )
-
-        AND (
-            p_start_date IS NULL
-            OR p_end_date IS NULL
-            OR inventory.is_available(r.id, p_start_date, p_end_date)
-        )
-
-    GROUP BY r.id, r.name, r.description, r.price_per_day, r.photos,
-             r.gender, r.privacy, r.inventory_type, r.category_id,
-             c.name, r.subcategory_id, sc.name, r.status, r.quality,
-             r.storage_location_id, sl.name, r.owner_id, o.name,
-             r.manager_id, m.name, r.size
-
-    ORDER BY r.name;
+        p.id,
+        p.name,
+        p.serial_id,
+        p.description,
+        p.price_per_day,
+        p.photos,
+        p.gender,
+        p.privacy,
+        p.inventory_type,
+        p.type_id,
+        p.type_name,
+        p.category_id,
+        p.category_name,
+        p.subcategory_id,
+        p.subcategory_name,
+        p.status,
+        p.quality,
+        p.is_in_stock,
+        p.storage_location_id,
+        p.storage_location_name,
+        p.owner_id,
+        p.owner_name,
+        p.manager_id,
+        p.manager_name,
+        p.size,
+        p.style_ids,
+        p.style_names,
+        p.colors
+    FROM inventory.get_reservables_page(
+        p_type, p_category_ids, p_subcategory_ids, p_gender, p_style_ids, p_status_ids,
+        p_start_date, p_end_date, p_is_in_stock, p_privacy_min, p_color_ids,
+        NULL, NULL, NULL
+    ) p;
 END;
 $$;
@@ -0,0 +1,169 @@
+-- ===========================================
+-- Page de get_reservables : mêmes filtres, pagination par curseur (keyset)
+-- sur (name, id) et projection des colonnes coûteuses.
+--
+--   p_limit   : nombre de lignes de la page (NULL = toutes)
+--   p_after   : curseur opaque de la dernière ligne de la page précédente
+--               (colonne "cursor"), NULL pour la première page
+--   p_columns : colonnes à calculer parmi description, photos, category_name,
+--               subcategory_name, storage_location_name, owner_name, manager_name,
+--               style_ids, style_names, colors (NULL = toutes). Les autres sont renvoyées à NULL.
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.get_reservables_page(
+    p_type inventory.reservable_type DEFAULT NULL,
+    p_category_ids INT[] DEFAULT NULL,
+    p_subcategory_ids INT[] DEFAULT NULL,
+    p_gender inventory.reservable_gender[] DEFAULT NULL,
+    p_style_ids INT[] DEFAULT NULL,
+    p_status_ids inventory.reservable_status[] DEFAULT NULL,
+    p_start_date TIMESTAMP DEFAULT NULL,
+    p_end_date TIMESTAMP DEFAULT NULL,
+    p_is_in_stock BOOLEAN DEFAULT NULL,
+    p_privacy_min inventory.privacy_type DEFAULT NULL,
+    p_color_ids INT[] DEFAULT NULL,
+    p_limit INT DEFAULT NULL,
+    p_after TEXT DEFAULT NULL,
+    p_columns TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    id INT,
+    name TEXT,
+    serial_id TEXT,
+    description TEXT,
+    price_per_day double precision,
+    photos JSONB,
+    gender inventory.reservable_gender,
+    privacy inventory.privacy_type,
+    inventory_type inventory.reservable_type,
+    type_id INT,
+    type_name TEXT,
+    category_id INT,
+    category_name TEXT,
+    subcategory_id INT,
+    subcategory_name TEXT,
+    status TEXT,
+    quality TEXT,
+    is_in_stock BOOLEAN,
+    storage_location_id INT,
+    storage_location_name TEXT,
+    owner_id INT,
+    owner_name TEXT,
+    manager_id INT,
+    manager_name TEXT,
+    size TEXT,
+    style_ids INT[],
+    style_names TEXT[],
+    colors JSONB,
+    cursor TEXT
+)
+LANGUAGE plpgsql STABLE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_all BOOLEAN := p_columns IS NULL;
+    v_after_name TEXT;
+    v_after_id INT;
+BEGIN
+    -- 🔹 Curseur = base64 de [name, id] de la dernière ligne déjà reçue
+    IF p_after IS NOT NULL THEN
+        BEGIN
+            SELECT c->>0, (c->>1)::int
+            INTO v_after_name, v_after_id
+            FROM (SELECT convert_from(decode(p_after, 'base64'), 'UTF8')::jsonb AS c) s;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE EXCEPTION 'Curseur de pagination invalide : %', p_after;
+        END;
+    END IF;
+
+    IF p_start_date IS NOT NULL AND p_end_date IS NOT NULL AND p_start_date >= p_end_date THEN
+        RAISE EXCEPTION 'La date de fin doit être après la date de début';
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        r.id,
+        r.name::text,
+        r.serial_id::text,
+        CASE WHEN v_all OR 'description' = ANY(p_columns) THEN r.description::text END,
+        r.price_per_day,
+        CASE WHEN v_all OR 'photos' = ANY(p_columns) THEN r.photos END,
+        r.gender,
+        r.privacy,
+        r.inventory_type,
+        NULL::INT AS type_id,
+        r.inventory_type::text AS type_name,
+        r.category_id,
+        CASE WHEN v_all OR 'category_name' = ANY(p_columns) THEN c.name::text END AS category_name,
+        r.subcategory_id,
+        CASE WHEN v_all OR 'subcategory_name' = ANY(p_columns) THEN sc.name::text END AS subcategory_name,
+        r.status::text AS status,
+        r.quality::text AS quality,
+        r.is_in_stock,
+        r.storage_location_id,
+        CASE WHEN v_all OR 'storage_location_name' = ANY(p_columns) THEN sl.name::text END AS storage_location_name,
+        r.owner_id,
+        CASE WHEN v_all OR 'owner_name' = ANY(p_columns) THEN o.name::text END AS owner_name,
+        r.manager_id,
+        CASE WHEN v_all OR 'manager_name' = ANY(p_columns) THEN m.name::text END AS manager_name,
+        r.size::text,
+        CASE WHEN v_all OR 'style_ids' = ANY(p_columns) THEN t.style_ids END,
+        CASE WHEN v_all OR 'style_names' = ANY(p_columns) THEN t.style_names END,
+        CASE WHEN v_all OR 'colors' = ANY(p_columns) THEN COALESCE(t.colors, '[]'::jsonb) END,
+        translate(encode(convert_to(jsonb_build_array(r.name, r.id)::text, 'UTF8'), 'base64'), E'\n', '') AS cursor
+
+    FROM inventory.reservable r
+    LEFT JOIN inventory.reservable_category c ON c.id = r.category_id
+    LEFT JOIN inventory.reservable_subcategory sc ON sc.id = r.subcategory_id
+    LEFT JOIN inventory.storage_location sl ON sl.id = r.storage_location_id
+    LEFT JOIN inventory.organization o ON o.id = r.owner_id
+    LEFT JOIN inventory.organization m ON m.id = r.manager_id
+
+    -- 🔹 Styles et couleurs déjà agrégés par objet (cache tenu à jour par triggers)
+    LEFT JOIN inventory.reservable_tags t ON t.reservable_id = r.id
+
+    -- 🔹 Disponibilité sur la période : objets des lots ayant une réservation qui la chevauche,
+    --    calculés en une fois puis exclus par anti-jointure (mêmes règles que is_available).
+    --    Sans période, l'ensemble est vide et n'exclut rien.
+    LEFT JOIN (
+        SELECT DISTINCT rbl.reservable_id
+        FROM inventory.reservable_booking rb
+        JOIN inventory.reservable_batch_link rbl ON rbl.batch_id = rb.reservable_batch_id
+        WHERE p_start_date IS NOT NULL
+          AND p_end_date IS NOT NULL
+          AND rb.period && tsrange(p_start_date, p_end_date, '[]')
+    ) busy ON busy.reservable_id = r.id
+
+    WHERE
+        (v_after_name IS NULL OR (r.name::text, r.id) > (v_after_name, v_after_id))
+
+        AND (p_type IS NULL OR r.inventory_type = p_type)
+        AND (p_category_ids IS NULL OR r.category_id = ANY(p_category_ids))
+        AND (p_subcategory_ids IS NULL OR r.subcategory_id = ANY(p_subcategory_ids))
+        AND (p_gender IS NULL OR r.gender = ANY(p_gender))
+        AND (p_status_ids IS NULL OR r.status = ANY(p_status_ids))
+
+        AND (
+            p_privacy_min IS NULL
+            OR array_position(ARRAY['hidden','private','public']::text[], r.privacy::text)
+                >= array_position(ARRAY['hidden','private','public']::text[], p_privacy_min::text)
+        )
+
+        AND (p_is_in_stock IS NULL OR p_is_in_stock = r.is_in_stock)
+
+        -- Au moins un des styles demandés
+        AND (p_style_ids IS NULL OR t.style_ids && p_style_ids)
+
+        -- Toutes les couleurs demandées
+        AND (p_color_ids IS NULL OR COALESCE(t.color_ids, '{}') @> p_color_ids)
+
+        AND busy.reservable_id IS NULL
+        AND (
+            p_start_date IS NULL
+            OR p_end_date IS NULL
+            OR (r.is_in_stock AND r.status = 'disponible')
+        )
+
+    ORDER BY r.name, r.id
+    LIMIT p_limit;
+END;
+$$;
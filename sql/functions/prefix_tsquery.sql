@@ -0,0 +1,15 @@
+-- ===========================================
+-- Requête plein texte « en cours de frappe » : chaque mot saisi, normalisé
+-- par la configuration (accents, racine, mots vides), devient un préfixe.
+--   prefix_tsquery('inventory.french_unaccent', 'robe cha') = 'cha':* & 'rob':*
+-- NULL si la saisie ne contient aucun mot significatif.
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.prefix_tsquery(p_config REGCONFIG, p_query TEXT)
+RETURNS TSQUERY
+LANGUAGE sql
+IMMUTABLE AS $$
+    -- Guillemets de la syntaxe tsquery (\ et ' échappés) ; pas quote_literal, qui
+    -- produit E'...' dès qu'il y a un antislash, préfixe que tsquery rejette
+    SELECT string_agg('''' || replace(replace(lexeme, '\', '\\'), '''', '''''') || ''':*', ' & ')::tsquery
+    FROM unnest(to_tsvector(p_config, coalesce(p_query, '')));
+$$;
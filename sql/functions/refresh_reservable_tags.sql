@@ -0,0 +1,49 @@
+-- ===========================================
+-- Recalcule les styles et couleurs dénormalisés (inventory.reservable_tags)
+-- des objets donnés, à partir des tables de liaison.
+-- Appelée par les triggers de create_triggers.sql ; idempotente.
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.refresh_reservable_tags(p_reservable_ids INT[])
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+VOLATILE AS $$
+    INSERT INTO inventory.reservable_tags (reservable_id, style_ids, style_names, color_ids, colors)
+    SELECT r.id, st.style_ids, st.style_names, co.color_ids, co.colors
+    FROM inventory.reservable r
+
+    LEFT JOIN LATERAL (
+        SELECT
+            array_agg(DISTINCT rs.id) AS style_ids,
+            array_agg(DISTINCT rs.name::text) AS style_names
+        FROM inventory.reservable_style_link rsl
+        JOIN inventory.reservable_style rs ON rs.id = rsl.style_id
+        WHERE rsl.reservable_id = r.id
+    ) st ON TRUE
+
+    LEFT JOIN LATERAL (
+        SELECT
+            COALESCE(array_agg(DISTINCT c.id), '{}') AS color_ids,
+            COALESCE(
+                jsonb_agg(
+                    DISTINCT jsonb_build_object(
+                        'id', c.id,
+                        'name', c.name,
+                        'hex_code', c.hex_code
+                    )
+                ),
+                '[]'::jsonb
+            ) AS colors
+        FROM inventory.reservable_color_link rc
+        JOIN inventory.color c ON c.id = rc.color_id
+        WHERE rc.reservable_id = r.id
+    ) co ON TRUE
+
+    WHERE r.id = ANY(p_reservable_ids)
+
+    ON CONFLICT (reservable_id) DO UPDATE SET
+        style_ids = EXCLUDED.style_ids,
+        style_names = EXCLUDED.style_names,
+        color_ids = EXCLUDED.color_ids,
+        colors = EXCLUDED.colors;
+$$;
@@ -0,0 +1,48 @@
+-- ===========================================
+-- Recherche d'organisations pour la saisie assistée (type-ahead)
+--
+-- Correspondance plein texte par préfixes sur le nom et l'adresse
+-- (inventory.organization.search_vector), ou approchée (trigrammes) sur le nom.
+-- Résultats classés par pertinence, au plus p_limit (max 100).
+--
+-- SECURITY DEFINER comme get_organizations : la RLS de inventory.organization
+-- n'est pas appliquée (la liste complète est déjà lisible par get_organizations).
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.search_organizations(
+    p_query TEXT,
+    p_limit INT DEFAULT 20
+)
+RETURNS TABLE (
+    id INT,
+    name TEXT,
+    address TEXT,
+    referent_id INT,
+    rank REAL
+)
+LANGUAGE plpgsql STABLE
+SECURITY DEFINER
+SET pg_trgm.word_similarity_threshold = 0.5
+AS $$
+DECLARE
+    v_query TEXT := btrim(coalesce(p_query, ''));
+    v_plain TEXT := public.immutable_unaccent(v_query);
+    v_tsquery TSQUERY := inventory.prefix_tsquery('inventory.simple_unaccent', v_query);
+BEGIN
+    IF v_query = '' THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        o.id,
+        o.name::text,
+        o.address::text,
+        o.referent_id,
+        (coalesce(ts_rank(o.search_vector, v_tsquery), 0) + word_similarity(v_plain, public.immutable_unaccent(o.name)))::real AS rank
+    FROM inventory.organization AS o
+    WHERE o.search_vector @@ v_tsquery
+       OR v_plain <% public.immutable_unaccent(o.name)
+    ORDER BY rank DESC, o.name, o.id
+    LIMIT least(coalesce(p_limit, 20), 100);
+END;
+$$;
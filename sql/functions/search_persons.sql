@@ -0,0 +1,58 @@
+-- ===========================================
+-- Recherche de personnes pour la saisie assistée (type-ahead)
+--
+-- Correspondance plein texte par préfixes sur le prénom, le nom et l'email
+-- (inventory.person.search_vector), ou approchée (trigrammes) sur
+-- « prénom nom » et l'email. Résultats classés par pertinence, au plus p_limit (max 100).
+--
+-- SECURITY DEFINER comme search_reservables / search_organizations (et toute fonction
+-- après set_basic_function_policies.sh) : la RLS de inventory.person n'est pas appliquée.
+-- Tous les rôles y ont SELECT (sql/auth/policies.yaml) ; à revoir si ce droit est restreint.
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.search_persons(
+    p_query TEXT,
+    p_limit INT DEFAULT 20
+)
+RETURNS TABLE (
+    id INT,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT,
+    phone TEXT,
+    rank REAL
+)
+LANGUAGE plpgsql STABLE
+SECURITY DEFINER
+SET pg_trgm.word_similarity_threshold = 0.5
+AS $$
+DECLARE
+    v_query TEXT := btrim(coalesce(p_query, ''));
+    v_plain TEXT := public.immutable_unaccent(v_query);
+    v_tsquery TSQUERY := inventory.prefix_tsquery('inventory.simple_unaccent', v_query);
+BEGIN
+    IF v_query = '' THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        p.id::int,
+        p.first_name::text,
+        p.last_name::text,
+        p.email::text,
+        p.phone::text,
+        (
+            coalesce(ts_rank(p.search_vector, v_tsquery), 0)
+            + greatest(
+                word_similarity(v_plain, public.immutable_unaccent(p.first_name || ' ' || p.last_name)),
+                word_similarity(v_plain, coalesce(p.email, ''))
+            )
+        )::real AS rank
+    FROM inventory.person AS p
+    WHERE p.search_vector @@ v_tsquery
+       OR v_plain <% public.immutable_unaccent(p.first_name || ' ' || p.last_name)
+       OR v_plain <% p.email
+    ORDER BY rank DESC, p.last_name, p.first_name, p.id
+    LIMIT least(coalesce(p_limit, 20), 100);
+END;
+$$;
@@ -0,0 +1,79 @@
+-- ===========================================
+-- Recherche d'objets pour la saisie assistée (type-ahead)
+--
+-- Correspondance plein texte par préfixes sur le nom, le numéro de série,
+-- la description et la taille (inventory.reservable.search_vector), ou
+-- approchée (trigrammes) sur le nom et le numéro de série : les fautes de
+-- frappe sont tolérées. Résultats classés par pertinence, au plus p_limit (max 100).
+--
+-- SECURITY DEFINER comme get_reservables : la RLS de inventory.reservable n'est pas
+-- appliquée, la visibilité des objets passe par p_privacy_min (même règle que la liste).
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.search_reservables(
+    p_query TEXT,
+    p_limit INT DEFAULT 20,
+    p_type inventory.reservable_type DEFAULT NULL,
+    p_privacy_min inventory.privacy_type DEFAULT NULL
+)
+RETURNS TABLE (
+    id INT,
+    name TEXT,
+    serial_id TEXT,
+    size TEXT,
+    inventory_type inventory.reservable_type,
+    category_id INT,
+    status TEXT,
+    is_in_stock BOOLEAN,
+    rank REAL
+)
+LANGUAGE plpgsql STABLE
+SECURITY DEFINER
+-- Seuil de <% (0.6 par défaut) : une lettre inversée dans un mot court reste trouvée
+SET pg_trgm.word_similarity_threshold = 0.5
+AS $$
+DECLARE
+    v_query TEXT := btrim(coalesce(p_query, ''));
+    v_plain TEXT := public.immutable_unaccent(v_query);
+    -- Nom et description racinisés (french), numéro de série et taille tels quels (simple)
+    v_french TSQUERY := inventory.prefix_tsquery('inventory.french_unaccent', v_query);
+    v_simple TSQUERY := inventory.prefix_tsquery('inventory.simple_unaccent', v_query);
+    v_tsquery TSQUERY := coalesce(v_french || v_simple, v_french, v_simple);
+BEGIN
+    IF v_query = '' THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        r.id,
+        r.name::text,
+        r.serial_id::text,
+        r.size::text,
+        r.inventory_type,
+        r.category_id,
+        r.status::text,
+        r.is_in_stock,
+        (
+            coalesce(ts_rank(r.search_vector, v_tsquery), 0)
+            + greatest(
+                word_similarity(v_plain, public.immutable_unaccent(r.name)),
+                word_similarity(v_plain, coalesce(r.serial_id, ''))
+            )
+        )::real AS rank
+    FROM inventory.reservable r
+    WHERE
+        (
+            r.search_vector @@ v_tsquery
+            OR v_plain <% public.immutable_unaccent(r.name)
+            OR v_plain <% r.serial_id
+        )
+        AND (p_type IS NULL OR r.inventory_type = p_type)
+        AND (
+            p_privacy_min IS NULL
+            OR array_position(ARRAY['hidden','private','public']::text[], r.privacy::text)
+                >= array_position(ARRAY['hidden','private','public']::text[], p_privacy_min::text)
+        )
+    ORDER BY rank DESC, r.name, r.id
+    LIMIT least(coalesce(p_limit, 20), 100);
+END;
+$$;
@@ -0,0 +1,37 @@
+-- ===========================================
+-- Trigger : tient inventory.reservable_tags à jour quand un objet est créé,
+-- quand ses liens style/couleur changent, ou quand un style ou une couleur
+-- est renommé (cf. create_triggers.sql).
+-- ===========================================
+CREATE OR REPLACE FUNCTION inventory.sync_reservable_tags()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+VOLATILE AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'reservable' THEN
+        PERFORM inventory.refresh_reservable_tags(ARRAY[NEW.id]);
+
+    ELSIF TG_TABLE_NAME IN ('reservable_style_link', 'reservable_color_link') THEN
+        -- OLD (resp. NEW) vaut NULL pour un INSERT (resp. DELETE) ; un objet supprimé
+        -- en cascade n'est plus dans inventory.reservable et n'est pas recalculé
+        PERFORM inventory.refresh_reservable_tags(ARRAY(
+            SELECT DISTINCT x.id
+            FROM (VALUES (OLD.reservable_id), (NEW.reservable_id)) AS x(id)
+            WHERE x.id IS NOT NULL
+        ));
+
+    ELSIF TG_TABLE_NAME = 'reservable_style' THEN
+        PERFORM inventory.refresh_reservable_tags(ARRAY(
+            SELECT reservable_id FROM inventory.reservable_style_link WHERE style_id = NEW.id
+        ));
+
+    ELSIF TG_TABLE_NAME = 'color' THEN
+        PERFORM inventory.refresh_reservable_tags(ARRAY(
+            SELECT reservable_id FROM inventory.reservable_color_link WHERE color_id = NEW.id
+        ));
+    END IF;
+
+    RETURN NULL;   -- AFTER trigger
+END;
+$$;
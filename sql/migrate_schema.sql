@@ -0,0 +1,123 @@
+-- ============================================================
+-- Mise à niveau d'une base existante vers sql/schema.sql
+-- ============================================================
+-- Script rejouable (IF NOT EXISTS partout) : ajoute les tables, colonnes et index
+-- apparus dans schema.sql depuis la création de la base. Sans effet sur une base
+-- créée avec le schema.sql courant.
+--
+-- Exécuté par scripts/reset_functions.sh AVANT l'import des fonctions (les fonctions
+-- LANGUAGE sql sont validées à leur création et échouent si une table manque).
+-- Le remplissage des données dérivées (reservable_tags) est fait APRÈS l'import,
+-- par create_triggers.sql, qui a besoin des fonctions.
+
+SET client_min_messages = warning;
+
+
+-- ===========================
+-- Extensions
+-- ===========================
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+
+-- ===========================
+-- Styles et couleurs dénormalisés par objet (inventory.reservable_tags)
+-- ===========================
+CREATE TABLE IF NOT EXISTS inventory.reservable_tags (
+    reservable_id INT PRIMARY KEY REFERENCES inventory.reservable(id) ON DELETE CASCADE,
+    style_ids INT[],
+    style_names TEXT[],
+    color_ids INT[] NOT NULL DEFAULT '{}',
+    colors JSONB NOT NULL DEFAULT '[]'::jsonb
+);
+
+CREATE INDEX IF NOT EXISTS idx_reservable_tags_styles
+    ON inventory.reservable_tags USING gin(style_ids);
+CREATE INDEX IF NOT EXISTS idx_reservable_tags_colors
+    ON inventory.reservable_tags USING gin(color_ids);
+
+
+-- ===========================
+-- Recherche plein texte (fonctions search_*)
+-- ===========================
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_ts_config c JOIN pg_namespace n ON n.oid = c.cfgnamespace
+    WHERE n.nspname = 'inventory' AND c.cfgname = 'french_unaccent'
+  ) THEN
+    CREATE TEXT SEARCH CONFIGURATION inventory.french_unaccent (COPY = pg_catalog.french);
+    ALTER TEXT SEARCH CONFIGURATION inventory.french_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+  END IF;
+
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_ts_config c JOIN pg_namespace n ON n.oid = c.cfgnamespace
+    WHERE n.nspname = 'inventory' AND c.cfgname = 'simple_unaccent'
+  ) THEN
+    CREATE TEXT SEARCH CONFIGURATION inventory.simple_unaccent (COPY = pg_catalog.simple);
+    ALTER TEXT SEARCH CONFIGURATION inventory.simple_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+  END IF;
+END
+$$;
+
+-- unaccent() n'est que STABLE (dictionnaire résolu par le search_path) : version IMMUTABLE,
+-- utilisable dans les index trigrammes de la recherche approchée. Hors du schéma inventory
+-- pour survivre à drop_all_functions.sql (les index en dépendent).
+CREATE OR REPLACE FUNCTION public.immutable_unaccent(TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1);
+$$;
+
+-- Colonnes générées : l'ajout réécrit la table (une fois) et calcule les lignes existantes
+ALTER TABLE inventory.person ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('inventory.simple_unaccent', first_name || ' ' || last_name), 'A') ||
+    setweight(to_tsvector('inventory.simple_unaccent', coalesce(email, '')), 'B')
+) STORED;
+
+ALTER TABLE inventory.organization ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('inventory.simple_unaccent', name), 'A') ||
+    setweight(to_tsvector('inventory.simple_unaccent', coalesce(address, '')), 'C')
+) STORED;
+
+ALTER TABLE inventory.reservable ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('inventory.french_unaccent', name), 'A') ||
+    setweight(to_tsvector('inventory.simple_unaccent', coalesce(serial_id, '')), 'A') ||
+    setweight(to_tsvector('inventory.french_unaccent', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('inventory.simple_unaccent', coalesce(size, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_reservable_search
+    ON inventory.reservable USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_reservable_name_unaccent_trgm
+    ON inventory.reservable USING gin(public.immutable_unaccent(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_reservable_serial_trgm
+    ON inventory.reservable USING gin(serial_id gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_person_search
+    ON inventory.person USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_person_name_unaccent_trgm
+    ON inventory.person USING gin(public.immutable_unaccent(first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_email_trgm
+    ON inventory.person USING gin(email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_organization_search
+    ON inventory.organization USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_organization_name_unaccent_trgm
+    ON inventory.organization USING gin(public.immutable_unaccent(name) gin_trgm_ops);
+
+
+-- ===========================
+-- Index retirés de schema.sql
+-- ===========================
+-- Doublon de l'index GiST de la contrainte EXCLUDE de reservable_booking
+DROP INDEX IF EXISTS inventory.idx_reservable_booking_period;
+
+-- Remplacés par les index trigrammes sur le texte sans accents (*_unaccent_trgm)
+DROP INDEX IF EXISTS inventory.idx_reservable_name_trgm;
+DROP INDEX IF EXISTS inventory.idx_person_name_trgm;
+DROP INDEX IF EXISTS inventory.idx_organization_name_trgm;
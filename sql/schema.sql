@@ -4,6 +4,7 @@
 CREATE EXTENSION IF NOT EXISTS btree_gist;
 CREATE EXTENSION IF NOT EXISTS unaccent;
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- ===========================
 -- Schema metier
@@ -28,6 +29,28 @@ CREATE TYPE inventory.reservable_batch_status AS ENUM (
     'in_stock', 'out', 'mixed'
 );
 
+-- ===========================
+-- Recherche plein texte insensible aux accents (fonctions search_*)
+--   french_unaccent : textes libres (racinisation française)
+--   simple_unaccent : noms propres, numéros de série, tailles, emails
+-- ===========================
+CREATE TEXT SEARCH CONFIGURATION inventory.french_unaccent (COPY = pg_catalog.french);
+ALTER TEXT SEARCH CONFIGURATION inventory.french_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+
+CREATE TEXT SEARCH CONFIGURATION inventory.simple_unaccent (COPY = pg_catalog.simple);
+ALTER TEXT SEARCH CONFIGURATION inventory.simple_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+
+-- unaccent() n'est que STABLE (dictionnaire résolu par le search_path) : version IMMUTABLE,
+-- utilisable dans les index trigrammes de la recherche approchée. Hors du schéma inventory
+-- pour survivre à drop_all_functions.sql (les index en dépendent).
+CREATE OR REPLACE FUNCTION public.immutable_unaccent(TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1);
+$$;
+
 -- ===========================
 -- Personnes et Organisations
 -- ===========================
@@ -38,6 +61,10 @@ CREATE TABLE inventory.person (
     address VARCHAR(150),
     email VARCHAR(150),
     phone VARCHAR(30),
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('inventory.simple_unaccent', first_name || ' ' || last_name), 'A') ||
+        setweight(to_tsvector('inventory.simple_unaccent', coalesce(email, '')), 'B')
+    ) STORED,
     UNIQUE (first_name, last_name),
     UNIQUE (email)
 );
@@ -46,7 +73,11 @@ CREATE TABLE inventory.organization (
     id SERIAL PRIMARY KEY,
     name VARCHAR(150) NOT NULL UNIQUE,
     address VARCHAR(200),
-    referent_id INT REFERENCES inventory.person(id) ON DELETE SET NULL
+    referent_id INT REFERENCES inventory.person(id) ON DELETE SET NULL,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('inventory.simple_unaccent', name), 'A') ||
+        setweight(to_tsvector('inventory.simple_unaccent', coalesce(address, '')), 'C')
+    ) STORED
 );
 
 -- ===========================
@@ -146,7 +177,13 @@ CREATE TABLE inventory.reservable (
     photos JSONB DEFAULT '[]'::jsonb,
     is_in_stock BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('inventory.french_unaccent', name), 'A') ||
+        setweight(to_tsvector('inventory.simple_unaccent', coalesce(serial_id, '')), 'A') ||
+        setweight(to_tsvector('inventory.french_unaccent', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('inventory.simple_unaccent', coalesce(size, '')), 'C')
+    ) STORED
 );
 
 -- ===========================
@@ -168,6 +205,19 @@ CREATE TABLE inventory.reservable_color_link (
     PRIMARY KEY (reservable_id, color_id)
 );
 
+-- ===========================
+-- Styles et couleurs dénormalisés par objet (cache de lecture des listes)
+-- Tenu à jour par les triggers de create_triggers.sql (inventory.sync_reservable_tags) ;
+-- hors sauvegarde : recalculé à partir des tables de liaison.
+-- ===========================
+CREATE TABLE inventory.reservable_tags (
+    reservable_id INT PRIMARY KEY REFERENCES inventory.reservable(id) ON DELETE CASCADE,
+    style_ids INT[],
+    style_names TEXT[],
+    color_ids INT[] NOT NULL DEFAULT '{}',
+    colors JSONB NOT NULL DEFAULT '[]'::jsonb
+);
+
 
 -- ===========================
 -- Lots d'objets
@@ -311,3 +361,40 @@ CREATE INDEX IF NOT EXISTS idx_reservable_booking_booking_ref
 
 CREATE INDEX IF NOT EXISTS idx_reservable_booking_start_end
     ON inventory.reservable_booking(start_date, end_date);
+
+-- Pagination par curseur de get_bookings_page (ORDER BY start_date, id)
+CREATE INDEX IF NOT EXISTS idx_reservable_booking_start_id
+    ON inventory.reservable_booking(start_date, id);
+
+-- Disponibilité par période (get_reservables_page) : les réservations qui chevauchent
+-- la période passent par l'index GiST de la contrainte EXCLUDE (reservable_batch_id, period),
+-- puis les objets des lots concernés par celui-ci
+CREATE INDEX IF NOT EXISTS idx_batch_link_reservable
+    ON inventory.reservable_batch_link(reservable_id);
+
+-- Recherche (search_reservables, search_persons, search_organizations) :
+-- plein texte (@@) et approchée par trigrammes (<%) sur le texte sans accents
+CREATE INDEX IF NOT EXISTS idx_reservable_search
+    ON inventory.reservable USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_reservable_name_unaccent_trgm
+    ON inventory.reservable USING gin(public.immutable_unaccent(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_reservable_serial_trgm
+    ON inventory.reservable USING gin(serial_id gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_person_search
+    ON inventory.person USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_person_name_unaccent_trgm
+    ON inventory.person USING gin(public.immutable_unaccent(first_name || ' ' || last_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_email_trgm
+    ON inventory.person USING gin(email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_organization_search
+    ON inventory.organization USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_organization_name_unaccent_trgm
+    ON inventory.organization USING gin(public.immutable_unaccent(name) gin_trgm_ops);
+
+-- Filtres style / couleur de get_reservables_page (&&, @>)
+CREATE INDEX IF NOT EXISTS idx_reservable_tags_styles
+    ON inventory.reservable_tags USING gin(style_ids);
+CREATE INDEX IF NOT EXISTS idx_reservable_tags_colors
+    ON inventory.reservable_tags USING gin(color_ids);
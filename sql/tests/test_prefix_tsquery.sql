@@ -0,0 +1,37 @@
+-- ===========================================
+-- Vérification de inventory.prefix_tsquery et des fonctions search_* sur des saisies
+-- contenant antislashs et apostrophes (à lancer avec psql sur une base de test) :
+--   psql -f sql/tests/test_prefix_tsquery.sql
+-- Lève une exception au premier écart.
+-- ===========================================
+DO $$
+DECLARE
+    r RECORD;
+    v_got TEXT;
+BEGIN
+    FOR r IN
+        SELECT * FROM (VALUES
+            ('inventory.simple_unaccent', 'robe cha',         $q$'cha':* & 'robe':*$q$),
+            ('inventory.french_unaccent', 'Écharpe soie',     $q$'echarp':* & 'soi':*$q$),
+            -- ʼ (U+02BC) est une lettre pour l'analyseur, ramenée à ' par unaccent
+            ('inventory.simple_unaccent', 'oʼbrien',          $q$'o''brien':*$q$),
+            ('inventory.simple_unaccent', $s$l'été c:\temp$s$, $q$'c':* & 'ete':* & 'l':* & 'temp':*$q$),
+            ('inventory.simple_unaccent', $s$a\'b\$s$,         $q$'a':* & 'b':*$q$),
+            ('inventory.simple_unaccent', $s$\\ ''$s$,         NULL),
+            ('inventory.french_unaccent', 'le de la',         NULL)
+        ) AS t(config, query, expected)
+    LOOP
+        v_got := inventory.prefix_tsquery(r.config::regconfig, r.query)::text;
+        IF v_got IS DISTINCT FROM r.expected::tsquery::text THEN
+            RAISE EXCEPTION 'prefix_tsquery(%, %) = %, attendu %', r.config, r.query, v_got, r.expected;
+        END IF;
+    END LOOP;
+
+    -- Les recherches ne doivent pas échouer sur ces saisies
+    PERFORM * FROM inventory.search_reservables($s$chapeau \ l'été oʼb\'$s$);
+    PERFORM * FROM inventory.search_persons($s$o'brien\ oʼbrien$s$);
+    PERFORM * FROM inventory.search_organizations($s$\\théâtre'$s$);
+
+    RAISE NOTICE '✅ prefix_tsquery : OK';
+END
+$$;